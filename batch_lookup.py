@@ -0,0 +1,170 @@
+"""
+Пакетное обогащение штрихкодов калорийностью и БЖУ.
+
+Запросы идут параллельно (не больше workers одновременно), с ограничением
+частоты (rate запросов в секунду) и повторами при сетевых ошибках, 429 и 5xx.
+Результаты выдаются по мере готовности, порядок входа не сохраняется.
+
+    python batch_lookup.py barcodes.csv -o enriched.csv --workers 8 --rate 1.5
+    cat barcodes.txt | python batch_lookup.py - > enriched.csv
+
+Open Food Facts просит не более 100 запросов в минуту на чтение товаров,
+поэтому по умолчанию rate=1.5. Для десятков тысяч штрихкодов лучше
+импортировать дамп (python -m core.offline_store) и запускать с PZ5_BACKEND=offline -
+тогда ограничение частоты не применяется.
+"""
+import argparse
+import csv
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+import core
+from core import off_client
+from core import offline_store
+from core import singleflight
+
+OUTPUT_FIELDS = ("code", "status", "product_name", "brands", "kcal_100g", "protein_100g",
+                 "fat_100g", "carbs_100g", "kcal_serving", "protein_serving", "fat_serving",
+                 "carbs_serving", "kcal_source", "error")
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def lookup_with_retries(barcode: str, limiter=None, retries=3, backoff=0.5) -> dict:
+    """
+    get_product_by_barcode с повторами: сетевые ошибки, 429 и 5xx повторяются
+    с экспоненциальной задержкой, 404 означает "товар не найден".
+    """
+    attempt = 0
+    while True:
+        try:
+            return core.get_product_by_barcode(barcode, limiter)
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            if status == 404:
+                return {"code": barcode, "status": 0, "status_verbose": "product not found"}
+            if status not in RETRY_STATUSES or attempt >= retries:
+                raise
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt >= retries:
+                raise
+        time.sleep(backoff * (2 ** attempt))
+        attempt += 1
+
+
+def enrich_barcode(barcode: str, limiter=None, retries=3) -> dict:
+    """Строка результата для одного штрихкода"""
+    row = {"code": barcode}
+    try:
+        result = lookup_with_retries(barcode, limiter, retries)
+    except Exception as e:
+        row["status"] = "error"
+        row["error"] = str(e)
+        return row
+
+    product = result.get("product")
+    if result.get("status") != 1 or not product:
+        row["status"] = "not_found"
+        return row
+
+    row["status"] = "found"
+    row["product_name"] = product.get("product_name")
+    row["brands"] = product.get("brands")
+    row.update(core.extract_kcal(product.get("nutriments") or {}, product.get("serving_size"),
+                                with_source=True))
+    return row
+
+
+def batch_lookup(barcodes, workers=8, rate=1.5, retries=3):
+    """
+    Генератор: обогащённые строки по мере готовности.
+
+    barcodes может быть любым итерируемым объектом (читается лениво, в работе
+    одновременно не больше 2 * workers штрихкодов).
+    """
+    limiter = None if offline_store.get_store() is not None else off_client.RateLimiter(rate)
+    if workers > off_client.POOL_SIZE:
+        off_client.configure(pool_size=workers)
+
+    barcodes = iter(barcodes)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+
+        def submit_next(n):
+            for barcode in barcodes:
+                barcode = str(barcode).strip()
+                if not barcode:
+                    continue
+                pending.add(executor.submit(enrich_barcode, barcode, limiter, retries))
+                n -= 1
+                if n == 0:
+                    break
+
+        submit_next(2 * workers)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                yield future.result()
+            submit_next(len(done))
+
+
+def read_barcodes(f, column="code"):
+    """Штрихкоды из CSV с колонкой column или из простого списка (по одному в строке)"""
+    first = f.readline()
+    if not first:
+        return
+    delimiter = "\t" if "\t" in first else ","
+    header = [name.strip() for name in first.rstrip("\r\n").split(delimiter)]
+    if column in header:
+        index = header.index(column)
+        for row in csv.reader(f, delimiter=delimiter):
+            if len(row) > index:
+                yield row[index]
+    else:
+        yield first.split(delimiter)[0]
+        for line in f:
+            yield line.split(delimiter)[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетный поиск калорийности по штрихкодам")
+    parser.add_argument("input", help="CSV/текстовый файл со штрихкодами или - для stdin")
+    parser.add_argument("-o", "--output", default="-", help="CSV с результатами (по умолчанию stdout)")
+    parser.add_argument("--column", default="code", help="колонка со штрихкодом во входном CSV")
+    parser.add_argument("--workers", type=int, default=8, help="число параллельных запросов")
+    parser.add_argument("--rate", type=float, default=1.5, help="запросов в секунду (0 - без ограничения)")
+    parser.add_argument("--retries", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    src = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8", newline="")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    writer = csv.DictWriter(dst, fieldnames=OUTPUT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+
+    counts = {"found": 0, "not_found": 0, "error": 0}
+    start = time.perf_counter()
+    try:
+        for row in batch_lookup(read_barcodes(src, args.column), args.workers, args.rate, args.retries):
+            writer.writerow(row)
+            counts[row["status"]] += 1
+            dst.flush()
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+
+    total = sum(counts.values())
+    elapsed = time.perf_counter() - start
+    collapsed = singleflight.get_single_flight().stats()["collapsed"]
+    print(f"✅ Обработано: {total} за {elapsed:.1f} с (найдено {counts['found']}, "
+          f"не найдено {counts['not_found']}, ошибок {counts['error']}, "
+          f"повторных штрихкодов объединено: {collapsed})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
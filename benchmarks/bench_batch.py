@@ -0,0 +1,47 @@
+"""
+Пакетный поиск по штрихкодам против локальной заглушки: последовательно
+и параллельно, с отказами 503 у каждого 10-го запроса (проверка повторов).
+
+python -m benchmarks.bench_batch [число штрихкодов]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from core import off_client
+from core import product_cache
+from batch_lookup import batch_lookup
+from benchmarks.stub_server import StubServer
+
+
+def run(n, workers):
+    with StubServer(delay=0.02, fail_every=10) as stub:
+        off_client.BASE = stub.base
+        # Каждый прогон - с пустым кэшем товаров, иначе запросов к заглушке нет
+        product_cache.get_cache().clear()
+        barcodes = (str(4600000000000 + i) for i in range(n))
+        start = time.perf_counter()
+        statuses = {}
+        for row in batch_lookup(barcodes, workers=workers, rate=0, retries=3):
+            statuses[row["status"]] = statuses.get(row["status"], 0) + 1
+        elapsed = time.perf_counter() - start
+        print(f"workers={workers:3}: {n} штрихкодов за {elapsed:.2f} с "
+              f"({n / elapsed:.0f}/с), {statuses}, запросов к заглушке {stub.requests_count}")
+
+
+def main(n=500):
+    base = off_client.BASE
+    with tempfile.TemporaryDirectory() as tmp:
+        # Кэш товаров - временный, не ~/.cache/pz5
+        os.environ["PZ5_CACHE_PATH"] = os.path.join(tmp, "cache.db")
+        try:
+            for workers in (1, 8, 32):
+                run(n, workers)
+        finally:
+            off_client.BASE = base
+            product_cache.get_cache().close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
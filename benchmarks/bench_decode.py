@@ -0,0 +1,77 @@
+"""
+Скорость разбора JSON установленными библиотеками (json_codec).
+
+Наборы: ответы на запрос товара (профиль detail), страница поиска из 100
+товаров (card) и строки дампа с полным документом товара (decode_product -
+как при импорте в офлайн-базу). Вместо синтетических наборов можно передать
+записанные ответы - файлы JSONL, один ответ или товар в строке.
+
+python -m benchmarks.bench_decode [записанные.jsonl ...]
+"""
+import json
+import os
+import sys
+import time
+
+from core import json_codec
+from core import off_client
+from benchmarks.stub_server import make_full_product, project
+
+# Сколько раз прогоняется каждый набор
+ROUNDS = 5
+
+
+def synthetic_fixtures() -> dict:
+    """{набор: (документы, это товары - меряется и decode_product)}"""
+    detail = off_client.fields("detail")
+    card = off_client.fields("card")
+    responses = [json.dumps({"code": str(code), "status": 1, "status_verbose": "product found",
+                             "product": project(make_full_product(code), detail)}).encode()
+                 for code in range(3017620422003, 3017620422003 + 1000)]
+    page = json.dumps({"count": 100, "page": 1, "page_size": 100, "products": [
+        project(make_full_product(1000000 + i, f"milk {i}"), card) for i in range(100)]}).encode()
+    dump = [json.dumps(make_full_product(code), ensure_ascii=False).encode()
+            for code in range(4600000000000, 4600000000000 + 1000)]
+    return {"товар (detail)": (responses, False), "поиск (card)": ([page] * 20, False), "дамп": (dump, True)}
+
+
+def recorded_fixtures(paths) -> dict:
+    fixtures = {}
+    for path in paths:
+        with open(path, "rb") as f:
+            documents = [line.strip() for line in f if line.strip()]
+        # Строка дампа - сам товар, ответ API - обёртка с "product"/"products"
+        first = json.loads(documents[0]) if documents else {}
+        fixtures[os.path.basename(path)] = (documents, "product" not in first and "products" not in first)
+    return fixtures
+
+
+def throughput(fn, documents) -> float:
+    """МБ/с, лучший из ROUNDS прогонов"""
+    size = sum(len(document) for document in documents)
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for document in documents:
+            fn(document)
+        best = min(best, time.perf_counter() - start)
+    return size / best / 2**20
+
+
+def main(paths=()):
+    fixtures = recorded_fixtures(paths) if paths else synthetic_fixtures()
+    backends = json_codec.available_backends()
+    print(f"Установлены: {', '.join(backends)}; МБ/с (больше - лучше)")
+    print(f"{'Набор':<20} {'операция':<15}" + "".join(f"{backend:>10}" for backend in backends))
+    for name, (documents, products) in fixtures.items():
+        for operation in ("loads", "decode_product") if products else ("loads",):
+            row = []
+            for backend in backends:
+                json_codec.set_backend(backend)
+                row.append(throughput(getattr(json_codec, operation), documents))
+            print(f"{name:<20} {operation:<15}" + "".join(f"{value:>10.0f}" for value in row))
+    json_codec.set_backend(None)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,71 @@
+"""
+Время импорта (python -X importtime): ядро core без Qt против окон и
+тяжёлых зависимостей.
+
+Каждый импорт - в новом процессе, результат - медиана ROUNDS запусков
+(первый запуск только прогревает кэш .pyc и не учитывается); модули, которые
+интерпретатор загружает при старте (site, encodings), не считаются. Строки
+"первое обращение" - сколько стоит загрузка, которую core откладывает.
+
+python -m benchmarks.bench_import [число запусков]
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ROUNDS = 5
+
+# Подпись -> код, импорт которого меряется
+TARGETS = {
+    "import core": "import core",
+    "первое обращение: core.Lookup": "import core; core.Lookup",
+    "первое обращение: core.extract_kcal": "import core; core.extract_kcal",
+    "lookup_cli (без Qt)": "import lookup_cli",
+    "main (окно)": "import main",
+    "pz5_menu_final (окно)": "import pz5_menu_final",
+    "PyQt6.QtWidgets": "import PyQt6.QtWidgets",
+    "requests": "import requests",
+    "numpy": "import numpy",
+}
+
+
+def import_lines(code) -> list:
+    """[(модуль, cumulative мкс, импорт верхнего уровня)] из -X importtime"""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stderr
+    lines = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Отступ в имени - вложенный импорт, он уже учтён в cumulative родителя
+        lines.append((name.strip(), int(cumulative), not name[1:].startswith(" ")))
+    return lines
+
+
+def import_time(code, startup) -> tuple:
+    """(мс импорта без модулей старта интерпретатора, загруженные Qt/requests/numpy)"""
+    lines = import_lines(code)
+    total = sum(cumulative for name, cumulative, top in lines if top and name not in startup)
+    heavy = {name.split(".")[0] for name, _, _ in lines} & {"PyQt6", "requests", "numpy"}
+    return total / 1000, heavy
+
+
+def main(rounds=ROUNDS):
+    startup = {name for name, _, _ in import_lines("pass")}
+    print(f"Медиана {rounds} запусков, мс; python -X importtime")
+    for title, code in TARGETS.items():
+        import_time(code, startup)
+        times = []
+        for _ in range(rounds):
+            ms, heavy = import_time(code, startup)
+            times.append(ms)
+        loaded = ", ".join(sorted(heavy)) or "-"
+        print(f"{title:<38} {statistics.median(times):>8.1f}   загружены: {loaded}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else ROUNDS)
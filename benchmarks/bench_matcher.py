@@ -0,0 +1,51 @@
+"""
+Фильтр по названию: старый цикл из search_products_by_name против NameMatcher.
+
+python -m benchmarks.bench_matcher [число товаров]
+"""
+import random
+import sys
+import timeit
+
+from core.name_matcher import NameMatcher
+
+WORDS = ("Milk", "Молоко", "Bread", "Хлеб", "Chocolate", "Шоколад", "Juice", "Сок", "Cheese",
+         "Organic", "Light", "Classic", "Dark", "Whole", "Sweet", "Fresh", "Natural", "Bio")
+
+
+def legacy_filter(products, query):
+    """Копия цикла фильтрации из SearchThread.search_products_by_name до NameMatcher"""
+    filtered_products = []
+    query_lower = query.lower()
+    for product in products:
+        product_name = product.get('product_name', '').lower()
+        product_name_en = product.get('product_name_en', '').lower()
+        if (query_lower in product_name or
+                query_lower in product_name_en or
+                any(query_lower in word for word in product_name.split()) or
+                any(query_lower in word for word in product_name_en.split())):
+            filtered_products.append(product)
+    return filtered_products
+
+
+def make_products(n):
+    rnd = random.Random(1)
+    return [{
+        "code": str(i),
+        "product_name": " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(2, 6))),
+        "product_name_en": " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(2, 6))),
+    } for i in range(n)]
+
+
+def main(n=5000, repeat=20):
+    products = make_products(n)
+    for query in ("milk", "шоколад", "xyz"):
+        assert NameMatcher(query).filter(products) == legacy_filter(products, query)
+        legacy = timeit.timeit(lambda: legacy_filter(products, query), number=repeat) / repeat
+        matcher = timeit.timeit(lambda: NameMatcher(query).filter(products), number=repeat) / repeat
+        print(f"{query!r:10} {n} товаров: цикл {legacy * 1000:.2f} мс, "
+              f"NameMatcher {matcher * 1000:.2f} мс ({legacy / matcher:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
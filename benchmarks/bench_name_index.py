@@ -0,0 +1,65 @@
+"""
+Задержка поиска по локальному индексу названий (p50/p99).
+
+python -m benchmarks.bench_name_index [число товаров, по умолчанию 1000000]
+"""
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from core.offline_store import OfflineStore
+
+WORDS = ("milk", "молоко", "bread", "хлеб", "chocolate", "шоколад", "juice", "сок", "cheese", "сыр",
+         "yogurt", "йогурт", "pasta", "rice", "apple", "banana", "water", "tea", "coffee", "cookies",
+         "organic", "light", "classic", "dark", "whole", "sweet", "salted", "fresh", "natural", "bio")
+BRANDS = ("Acme", "Nestle", "Danone", "Barilla", "Простоквашино", "Ferrero", "Heinz", "Lipton")
+QUERIES = ("milk", "mil", "молоко", "мол", "dark chocolate", "choc", "сыр classic", "juice fresh",
+           "nestle", "bio yog", "xyz", "a")
+
+
+def write_fixture(path, n):
+    rnd = random.Random(42)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n):
+            name = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(1, 4))) + f" {i % 1000}"
+            f.write(json.dumps({
+                "code": str(4600000000000 + i),
+                "product_name": name,
+                "brands": rnd.choice(BRANDS),
+                "unique_scans_n": int(rnd.paretovariate(1.2)),
+                "nutriments": {"energy-kcal_100g": rnd.randint(0, 900)},
+            }, ensure_ascii=False) + "\n")
+
+
+def main(n=1_000_000, rounds=200):
+    with tempfile.TemporaryDirectory() as tmp:
+        dump = os.path.join(tmp, "fixture.jsonl")
+        start = time.perf_counter()
+        write_fixture(dump, n)
+        print(f"Фикстура: {n} товаров за {time.perf_counter() - start:.1f} с")
+
+        store = OfflineStore(os.path.join(tmp, "off.sqlite3"))
+        start = time.perf_counter()
+        store.import_dump(dump)
+        print(f"Импорт + индекс: {time.perf_counter() - start:.1f} с")
+
+        for query in QUERIES:
+            store.search_names(query)  # прогрев
+            timings = []
+            for _ in range(rounds):
+                t = time.perf_counter()
+                store.search_names(query, limit=15)
+                timings.append((time.perf_counter() - t) * 1000)
+            timings.sort()
+            p50 = statistics.median(timings)
+            p99 = timings[int(len(timings) * 0.99) - 1]
+            print(f"{query!r:20} p50 {p50:.3f} мс  p99 {p99:.3f} мс")
+        store.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,117 @@
+"""
+Калорийность и БЖУ для отчёта: extract_kcal по одному товару против столбцов
+nutrients.nutrient_columns, затем нормализация (nutrients.normalize):
+калорийность из кДж и по БЖУ, значения на порцию и упаковку. В конце -
+время core.extract_kcal на один товар (показ товара в окне) и сверка с
+normalize.
+
+python -m benchmarks.bench_nutrients [число товаров]
+"""
+import random
+import sys
+import time
+
+import numpy as np
+
+from core.nutrient_rules import KCAL_FROM_KJ, KCAL_FROM_MACROS
+from core.nutrition import KCAL_FIELDS, extract_kcal
+from core.nutrients import normalize, nutrient_columns
+
+
+def legacy_extract_kcal(nutriments: dict) -> dict:
+    """Копия extract_kcal из main.py до столбцов"""
+    get = nutriments.get
+    data = {
+        "kcal_100g": get("energy-kcal_100g") or get("energy-kcal_value"),
+        "protein_100g": get("proteins_100g"),
+        "fat_100g": get("fat_100g"),
+        "carbs_100g": get("carbohydrates_100g"),
+        "kcal_serving": get("energy-kcal_serving"),
+        "protein_serving": get("proteins_serving"),
+        "fat_serving": get("fat_serving"),
+        "carbs_serving": get("carbohydrates_serving"),
+    }
+    return {k: v for k, v in data.items() if v is not None}
+
+
+def make_nutriments(n):
+    """Нутриенты как в дампе: часть значений отсутствует, часть - строки"""
+    rnd = random.Random(1)
+    keys = ("energy-kcal_100g", "proteins_100g", "fat_100g", "carbohydrates_100g", "sugars_100g",
+            "fiber_100g", "salt_100g", "energy-kcal_serving", "proteins_serving", "fat_serving",
+            "carbohydrates_serving")
+    result = []
+    for _ in range(n):
+        nutriments = {}
+        for key in keys:
+            if rnd.random() < 0.8:
+                value = round(rnd.uniform(0.1, 100), 1)
+                nutriments[key] = str(value) if rnd.random() < 0.05 else value
+        if "energy-kcal_100g" not in nutriments and rnd.random() < 0.5:
+            nutriments["energy-kcal_value"] = round(rnd.uniform(0.1, 900), 1)
+        if rnd.random() < 0.3:
+            nutriments["energy_100g"] = round(rnd.uniform(1, 3700), 1)
+        result.append(nutriments)
+    return result
+
+
+def make_sizes(n):
+    """serving_size и quantity: небольшой набор повторяющихся строк, часть пустых"""
+    rnd = random.Random(2)
+    servings = ("30 g", "1 portion (25 g)", "2 x 25 g", "250 ml", "1 biscuit", "", None)
+    quantities = ("330 ml", "1 l", "6 x 1,5 L", "500 g", "2 x 100 g", "12 oz", "", None)
+    return [rnd.choice(servings) for _ in range(n)], [rnd.choice(quantities) for _ in range(n)]
+
+
+def main(n=100000):
+    nutriments = make_nutriments(n)
+
+    start = time.perf_counter()
+    rows = [legacy_extract_kcal(item) for item in nutriments]
+    # Отчёту нужны числа: средняя калорийность по товарам, где она есть
+    kcal = [float(row["kcal_100g"]) for row in rows if "kcal_100g" in row]
+    legacy_mean = sum(kcal) / len(kcal)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columns = nutrient_columns(nutriments)
+    mean = np.nanmean(columns["kcal_100g"])
+    columnar = time.perf_counter() - start
+
+    assert abs(mean - legacy_mean) < 1e-6
+
+    serving_sizes, quantities = make_sizes(n)
+    start = time.perf_counter()
+    table = normalize(columns, serving_sizes, quantities)
+    normalized = time.perf_counter() - start
+    source = table["kcal_source"]
+
+    print(f"Товаров: {n}, столбцов: {len(columns)}")
+    print(f"extract_kcal по одному: {legacy * 1000:.0f} мс (8 полей)")
+    print(f"nutrient_columns:       {columnar * 1000:.0f} мс ({len(columns)} полей, {legacy / columnar:.1f}x)")
+    print(f"normalize:              {normalized * 1000:.0f} мс (порция и упаковка, {len(table)} полей)")
+    print(f"Средняя калорийность: {mean:.1f} ккал/100г, "
+          f"нет данных у {np.isnan(columns['kcal_100g']).sum()} товаров")
+    print(f"После нормализации: из кДж {(source == KCAL_FROM_KJ).sum()}, по БЖУ {(source == KCAL_FROM_MACROS).sum()}, "
+          f"нет данных у {np.isnan(table['kcal_100g']).sum()}; "
+          f"на упаковку посчитано у {(~np.isnan(table['kcal_package'])).sum()} товаров")
+
+    # Один товар за вызов, как в окне: без массивов NumPy
+    count = min(n, 10000)
+    start = time.perf_counter()
+    rows = [extract_kcal(nutriments[i], serving_sizes[i]) for i in range(count)]
+    single = (time.perf_counter() - start) / count
+    start = time.perf_counter()
+    for i in range(min(count, 1000)):
+        normalize(nutrient_columns([nutriments[i]]), [serving_sizes[i]])
+    via_arrays = (time.perf_counter() - start) / min(count, 1000)
+    for i, row in enumerate(rows):
+        for field, column in KCAL_FIELDS.items():
+            expected = table[column][i]
+            assert (field not in row) if np.isnan(expected) else abs(row[field] - expected) < 1e-9
+    print(f"core.extract_kcal на товар: {single * 1e6:.1f} мкс "
+          f"(через столбцы NumPy {via_arrays * 1e6:.1f} мкс), совпадает с normalize у {count} товаров")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,41 @@
+"""
+Объём ответов: полный документ товара (v0 без fields) против профилей полей,
+до и после сжатия.
+
+python -m benchmarks.bench_payload [число запросов]
+"""
+import sys
+
+from core import off_client
+from benchmarks.stub_server import StubServer
+
+
+def main(n=50):
+    with StubServer() as stub:
+        off_client.reset_traffic()
+        for i in range(n):
+            code = 3017620422003 + i
+            off_client.get(f"{stub.base}/api/v0/product/{code}.json", kind="v0 без fields")
+            for profile in off_client.FIELD_PROFILES:
+                off_client.get(f"{stub.base}/api/v2/product/{code}",
+                               params={"fields": off_client.fields(profile)}, kind=f"v2 {profile}")
+        off_client.get(f"{stub.base}/cgi/search.pl",
+                       params={"search_terms": "milk", "page_size": 100, "json": 1}, kind="поиск без fields")
+        off_client.get(f"{stub.base}/cgi/search.pl",
+                       params={"search_terms": "milk", "page_size": 100, "json": 1,
+                               "fields": off_client.fields("card")}, kind="поиск card")
+
+    stats = off_client.traffic_stats()
+    baselines = {"v2": stats["v0 без fields"]["body_bytes"], "поиск": stats["поиск без fields"]["body_bytes"]}
+    print(f"Accept-Encoding: {off_client.ACCEPT_ENCODING}")
+    print(f"{'Тип запроса':<20} {'запросов':>8} {'тело, байт':>11} {'по сети':>9} {'доля':>7}")
+    for kind, kind_stats in stats.items():
+        n = kind_stats["requests"]
+        full = baselines.get(kind.split()[0], kind_stats["body_bytes"]) / n
+        print(f"{kind:<20} {n:>8} {kind_stats['body_bytes'] // n:>11} {kind_stats['wire_bytes'] // n:>9} "
+              f"{kind_stats['body_bytes'] / n / full:>7.1%}")
+    print("(на ответ; доля - от тела ответа без fields; поиск - одна страница из 100 товаров;")
+    print(" синтетические товары сжимаются сильнее настоящих)")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
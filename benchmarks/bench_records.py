@@ -0,0 +1,69 @@
+"""
+Память и доступ к полям: словари товаров из ответа API против записей Product.
+
+python -m benchmarks.bench_records [число товаров]
+"""
+import json
+import sys
+import time
+import tracemalloc
+
+from core import off_client
+from benchmarks.stub_server import make_full_product, project
+from core.product_record import Product
+
+
+def search_body(n):
+    """JSON-массив товаров, как они приходят из поиска (профиль card)"""
+    card = off_client.fields("card")
+    return json.dumps([project(make_full_product(1000000 + i, f"milk {i}"), card) for i in range(n)])
+
+
+def measure_memory(build):
+    tracemalloc.start()
+    products = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return products, size
+
+
+def render_fields_dict(products):
+    for product in products:
+        name = product.get('product_name') or product.get('product_name_en')
+        brand = product.get('brands', '')
+        calories = (product.get('nutriments') or {}).get('energy-kcal_100g')
+    return name, brand, calories
+
+
+def render_fields_record(products):
+    for product in products:
+        name = product.display_name
+        brand = product.brands
+        calories = product.nutrition.kcal_100g
+    return name, brand, calories
+
+
+def best_time(fn, products, rounds=5):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(products)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(n=10000):
+    body = search_body(n)
+    dicts, dict_size = measure_memory(lambda: json.loads(body))
+    records, record_size = measure_memory(lambda: [Product.from_dict(product) for product in json.loads(body)])
+    print(f"Товаров: {n}")
+    print(f"Словари API:    {dict_size / n:>8.0f} байт/товар")
+    print(f"Записи Product: {record_size / n:>8.0f} байт/товар ({dict_size / record_size:.1f}x меньше)")
+    dict_time = best_time(render_fields_dict, dicts)
+    record_time = best_time(render_fields_record, records)
+    print(f"Поля карточки (название, бренд, ккал): словари {dict_time * 1e9 / n:.0f} нс/товар, "
+          f"записи {record_time * 1e9 / n:.0f} нс/товар")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
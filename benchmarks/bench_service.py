@@ -0,0 +1,135 @@
+"""
+Локальный сервис (lookup_service.py) на заглушке: несколько киосков ищут
+одни и те же штрихкоды напрямую в API и через сервис.
+
+Сервис запускается отдельным процессом с временным кэшем, upstream -
+заглушка с задержкой. Проверяются /product, /search, POST /batch, /stats и
+работа кода окон (core, off_client) через PZ5_OFF_BASE.
+
+python -m benchmarks.bench_service [киосков] [штрихкодов]
+"""
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+import core
+from core import off_client
+from core import product_cache
+from benchmarks.stub_server import StubServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Задержка ответа заглушки, с (как у API из магазина)
+UPSTREAM_DELAY = 0.05
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_service(upstream, cache_path):
+    port = free_port()
+    env = dict(os.environ, PZ5_CACHE_PATH=cache_path)
+    process = subprocess.Popen(
+        [sys.executable, "lookup_service.py", "--port", str(port), "--upstream", upstream,
+         "--rate", "0", "--quiet"], cwd=ROOT, env=env, stdout=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            requests.get(f"{base}/stats", timeout=1)
+            return process, base
+        except requests.ConnectionError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("сервис не запустился")
+
+
+def kiosks(url_for, barcodes, count):
+    """count киосков (потоков со своей сессией) запрашивают все barcodes; секунды"""
+    errors = []
+
+    def kiosk(seed):
+        session = off_client.make_session()
+        order = list(barcodes)
+        random.Random(seed).shuffle(order)
+        for barcode in order:
+            response = session.get(url_for(barcode), timeout=10)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+        session.close()
+
+    threads = [threading.Thread(target=kiosk, args=(i,)) for i in range(count)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors, errors[:5]
+    return time.perf_counter() - start
+
+
+def main(count=8, n=50):
+    barcodes = [str(4600000000000 + i) for i in range(n)]
+    with StubServer(delay=UPSTREAM_DELAY) as stub, tempfile.TemporaryDirectory() as tmp:
+        # У кода окон в этом процессе свой кэш товаров - тоже временный
+        os.environ["PZ5_CACHE_PATH"] = os.path.join(tmp, "windows.db")
+        direct = kiosks(lambda code: f"{stub.base}/api/v2/product/{code}?fields={off_client.fields('detail')}",
+                        barcodes, count)
+        direct_requests = stub.requests_count
+
+        process, base = start_service(stub.base, os.path.join(tmp, "cache.db"))
+        try:
+            before = stub.requests_count
+            served = kiosks(lambda code: f"{base}/product/{code}", barcodes, count)
+            service_requests = stub.requests_count - before
+            print(f"Киосков: {count}, штрихкодов: {n}, задержка API {UPSTREAM_DELAY * 1000:.0f} мс")
+            print(f"Напрямую:     {direct:.2f} с, запросов к API {direct_requests}")
+            print(f"Через сервис: {served:.2f} с, запросов к API {service_requests}")
+
+            session = off_client.make_session()
+            record = session.get(f"{base}/product/{barcodes[0]}").json()
+            assert record["status"] == "found" and record["product"]["nutrition"]["kcal_100g"]
+            assert session.get(f"{base}/product/abc").status_code == 404
+            found = session.get(f"{base}/search", params={"q": "milk"}).json()
+            similar = session.get(f"{base}/search", params={"q": barcodes[0], "type": "similar"}).json()
+            start = time.perf_counter()
+            queries = barcodes + ["name\tmilk", {"type": "barcode", "query": "abc"}]
+            batch = session.post(f"{base}/batch", data=json.dumps(queries)).json()
+            batch_time = time.perf_counter() - start
+            statuses = [result["status"] for result in batch["results"]]
+            assert statuses.count("found") == n + 1 and statuses[-1] == "not_found"
+            print(f"/search: {found['count']} товаров, похожих: {similar['count']}; "
+                  f"POST /batch из {batch['count']} запросов: {batch_time * 1000:.0f} мс")
+
+            # Код окон через PZ5_OFF_BASE (здесь - подменой off_client.BASE)
+            off_client.BASE = base
+            assert core.get_product_by_barcode(barcodes[1])["status"] == 1
+            assert core.get_product_by_barcode("abc")["status"] == 0
+            before = stub.requests_count
+            pages = [core.search_text("milk", page_size=10) for _ in range(5)]
+            assert all(len(page["products"]) == 10 for page in pages)
+            print(f"Окна через сервис: товар из общего кэша, 5 одинаковых поисков - "
+                  f"{stub.requests_count - before} запрос к API")
+
+            stats = session.get(f"{base}/stats").json()
+            print(f"/stats: кэш товаров {stats['product_cache']}, "
+                  f"объединено запросов {stats['single_flight']['collapsed']}")
+        finally:
+            off_client.BASE = off_client.DEFAULT_BASE
+            product_cache.get_cache().close()
+            process.terminate()
+            process.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
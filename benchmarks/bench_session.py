@@ -0,0 +1,42 @@
+"""
+Сравнение задержки запроса: голый requests.get против общей сессии off_client.
+
+python -m benchmarks.bench_session [число запросов]
+"""
+import sys
+import time
+
+import requests
+
+from core import off_client
+from benchmarks.stub_server import StubServer
+
+
+def measure(get, url, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        get(url, timeout=5).raise_for_status()
+    return (time.perf_counter() - start) / n
+
+
+def main(n=500):
+    with StubServer() as stub:
+        url = f"{stub.base}/api/v0/product/3017620422003.json"
+        session = off_client.make_session()
+        # Прогрев
+        requests.get(url, timeout=5)
+        session.get(url, timeout=5)
+
+        bare = measure(requests.get, url, n)
+        pooled = measure(session.get, url, n)
+        session.close()
+
+    print(f"Запросов: {n}")
+    print(f"requests.get:     {bare * 1000:.3f} мс/запрос")
+    print(f"off_client сессия: {pooled * 1000:.3f} мс/запрос")
+    print(f"Экономия:         {(bare - pooled) * 1000:.3f} мс/запрос ({bare / pooled:.1f}x)")
+    print("(на localhost без TLS; с реальным HTTPS экономия на рукопожатии больше)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,71 @@
+"""
+Пиковая память разбора страницы поиска: response.json() против потокового
+разбора off_client.stream_items() с фильтрацией по названию на лету.
+
+Каждое измерение идёт в отдельном процессе (tracemalloc считает память всего
+процесса, а заглушка работает в этом).
+
+python -m benchmarks.bench_stream [размеры страниц через запятую]
+"""
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from core import off_client
+from benchmarks.stub_server import StubServer
+from core.name_matcher import NameMatcher
+
+QUERY = "milk"
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(mode, base, page_size):
+    """Разбор одной страницы в этом процессе: (пик памяти, секунды, найдено)"""
+    url = f"{base}/cgi/search.pl"
+    params = {"search_terms": QUERY, "page_size": page_size, "json": 1,
+              "fields": off_client.fields("card")}
+    matcher = NameMatcher(f"{QUERY} 1")
+    off_client.get(url, params={**params, "page_size": 1})  # Соединение и импорт - вне замера
+    tracemalloc.start()
+    start = time.perf_counter()
+    if mode == "json":
+        products = off_client.get(url, params=params, kind="search").json()["products"]
+        found = sum(1 for product in products if matcher.matches(product))
+        del products
+    else:
+        response = off_client.get(url, params=params, kind="search", stream=True)
+        found = sum(1 for product in off_client.stream_items(response, kind="search")
+                    if matcher.matches(product))
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    # Найденные товары не накапливаются: меряется только память разбора
+    return peak, elapsed, found
+
+
+def main(page_sizes=(500, 2000, 5000)):
+    print(f"{'товаров':>8} {'json(), МБ':>11} {'поток, МБ':>10} {'json(), мс':>11} {'поток, мс':>10}")
+    for page_size in page_sizes:
+        with StubServer(total=page_size) as stub:
+            results = {}
+            for mode in ("json", "stream"):
+                out = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_stream", "--measure", mode, stub.base,
+                     str(page_size)], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+                results[mode] = [float(x) for x in out.split()]
+        json_peak, json_time, json_found = results["json"]
+        stream_peak, stream_time, stream_found = results["stream"]
+        assert json_found == stream_found
+        print(f"{page_size:>8} {json_peak / 2**20:>11.1f} {stream_peak / 2**20:>10.1f} "
+              f"{json_time * 1000:>11.0f} {stream_time * 1000:>10.0f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--measure":
+        print(*measure(sys.argv[2], sys.argv[3], int(sys.argv[4])))
+    elif len(sys.argv) > 1:
+        main([int(n) for n in sys.argv[1].split(",")])
+    else:
+        main()
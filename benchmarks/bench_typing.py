@@ -0,0 +1,82 @@
+"""
+Поиск при вводе: сколько запросов к API уходит, пока пользователь набирает
+запрос, и насколько долго блокируется цикл событий интерфейса.
+
+Сравниваются поиск на каждое нажатие клавиши и режим «Искать при вводе»
+(debounce + отмена устаревших запросов). Товары из кэша по началу запроса
+показываются только предварительно: ответ на каждый набранный запрос -
+от API, поэтому оба режима дают одинаковые результаты.
+
+QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_typing
+"""
+import os
+import sys
+import tempfile
+import time
+
+from PyQt6.QtWidgets import QApplication
+
+from core import off_client
+from core import product_cache
+import pz5_menu_final
+from core import search_cache
+from benchmarks.stub_server import StubServer
+
+QUERIES = ("chocolate", "chocolate dark", "milk", "milk 3")
+KEY_INTERVAL = 0.12  # секунд между нажатиями
+
+
+def type_queries(app, window, on_key):
+    """Набирает QUERIES посимвольно, возвращает самую долгую паузу цикла событий"""
+    worst = 0.0
+    for query in QUERIES:
+        window.search_input.clear()
+        for i in range(1, len(query) + 1):
+            window.search_input.setText(query[:i])
+            on_key(query[:i])
+            deadline = time.monotonic() + KEY_INTERVAL
+            while time.monotonic() < deadline:
+                t = time.perf_counter()
+                app.processEvents()
+                worst = max(worst, time.perf_counter() - t)
+                time.sleep(0.002)
+        deadline = time.monotonic() + 1.0
+        while time.monotonic() < deadline:
+            t = time.perf_counter()
+            app.processEvents()
+            worst = max(worst, time.perf_counter() - t)
+            time.sleep(0.002)
+    return worst
+
+
+def run(app, stub, incremental):
+    search_cache.get_search_cache().clear()
+    window = pz5_menu_final.NutritionApp()
+    window.incremental_checkbox.setChecked(incremental)
+    before = stub.requests_count
+    if incremental:
+        on_key = window.on_search_text_edited
+    else:
+        on_key = lambda text: window.search_by_name()
+    worst = type_queries(app, window, on_key)
+    requests_made = stub.requests_count - before
+    window.close()
+    return requests_made, worst
+
+
+def main():
+    app = QApplication.instance() or QApplication(sys.argv)
+    with StubServer(delay=0.05, total=25) as stub, tempfile.TemporaryDirectory() as tmp:
+        # Предзагрузка карточек пишет в кэш товаров - временный, не ~/.cache/pz5
+        os.environ["PZ5_CACHE_PATH"] = os.path.join(tmp, "cache.db")
+        off_client.BASE = stub.base
+        keystrokes = sum(len(q) for q in QUERIES)
+        for title, incremental in (("На каждое нажатие", False), ("Искать при вводе", True)):
+            requests_made, worst = run(app, stub, incremental)
+            print(f"{title:18}: {keystrokes} нажатий, {len(QUERIES)} набранных запроса -> "
+                  f"{requests_made} запросов к API, макс. пауза интерфейса {worst * 1000:.1f} мс")
+        product_cache.get_cache().close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Стресс-тест отмены: 1000 быстрых поисков подряд в окне NutritionApp против
+локальной заглушки. После завершения не должно остаться ни незавершённых
+задач в пуле, ни лишних открытых сокетов, а панели должен перерисовать только последний поиск.
+
+QT_QPA_PLATFORM=offscreen python -m benchmarks.stress_cancel [число поисков]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from PyQt6.QtCore import QCoreApplication, QEvent
+from PyQt6.QtWidgets import QApplication
+
+from core import off_client
+from core import product_cache
+import pz5_menu_final
+from benchmarks.stub_server import StubServer
+
+
+def open_sockets():
+    """Число открытых сокетов процесса (клиентских и заглушки), только Linux"""
+    count = 0
+    for fd in os.listdir("/proc/self/fd"):
+        try:
+            count += os.readlink(f"/proc/self/fd/{fd}").startswith("socket:")
+        except OSError:
+            pass
+    return count
+
+
+def process_events(app, seconds):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        app.processEvents()
+        QCoreApplication.sendPostedEvents(None, QEvent.Type.DeferredDelete.value)
+        time.sleep(0.005)
+
+
+def main(n=1000):
+    app = QApplication.instance() or QApplication(sys.argv)
+    with StubServer(delay=0.01, total=30) as stub, tempfile.TemporaryDirectory() as tmp:
+        # Предзагрузка карточек пишет в кэш товаров - временный, не ~/.cache/pz5
+        os.environ["PZ5_CACHE_PATH"] = os.path.join(tmp, "cache.db")
+        off_client.BASE = stub.base
+        window = pz5_menu_final.NutritionApp()
+        process_events(app, 0.2)
+        sockets_before = open_sockets()
+
+        applied = []
+        original = window.add_found_products
+        window.add_found_products = lambda products: (applied.append(window.search_seq), original(products))
+
+        start = time.perf_counter()
+        for i in range(n):
+            window.search_input.setText(f"query {i}")
+            window.search_by_name()
+            if i % 10 == 0:
+                app.processEvents()
+        fired = time.perf_counter() - start
+
+        # Ждём, пока пул разберёт очередь и все запросы завершатся
+        window.lookup_pool.wait(30000)
+        process_events(app, 0.5)
+
+        stats = window.lookup_pool.stats()
+        alive = stats["queued"] + stats["active"]
+        stale = [seq for seq in applied if seq != window.search_seq]
+        print(f"Поисков: {n} за {fired:.2f} с, запросов к заглушке: {stub.requests_count}")
+        print(f"Незавершённых задач: {alive}, выполнено задач: {stats['completed']}, "
+              f"потоков пула: {window.lookup_pool.pool.activeThreadCount()} из {stats['workers']}")
+        print(f"Сокетов: было {sockets_before}, стало {open_sockets()} "
+              f"(клиент и заглушка, пул keep-alive до {off_client.POOL_SIZE})")
+        off_client.close()
+        process_events(app, 0.2)
+        print(f"Сокетов после закрытия пула: {open_sockets()}")
+        print(f"Перерисовок панелей: {len(applied)}, из них от устаревших поисков: {len(stale)}")
+        print(f"Итог: {window.stats_label.text()!r}")
+        window.close()
+        product_cache.get_cache().close()
+    return alive == 0 and not stale
+
+
+if __name__ == "__main__":
+    ok = main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,146 @@
+"""
+Локальная заглушка Open Food Facts для бенчмарков.
+
+Отвечает на /api/v0/product/<код>.json, /api/v2/product/<код> и
+/cgi/search.pl синтетическими товарами, поддерживает keep-alive (HTTP/1.1).
+fail_every=N - каждый N-й запрос отвечает 503 (для проверки повторов).
+Без параметра fields товар отдаётся целиком, с "тяжёлыми" полями, как в API.
+Ответ сжимается gzip, если клиент прислал Accept-Encoding: gzip.
+"""
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def make_product(code, name=None):
+    """Синтетический товар в формате Open Food Facts"""
+    return {
+        "code": str(code),
+        "product_name": name or f"Product {code}",
+        "brands": "Stub",
+        "categories": "Snacks, Sweet snacks",
+        "quantity": "100 g",
+        "serving_size": "25 g",
+        "nutriments": {
+            "energy-kcal_100g": 500,
+            "proteins_100g": 6.3,
+            "fat_100g": 30.9,
+            "carbohydrates_100g": 57.5,
+            "sugars_100g": 56.3,
+            "salt_100g": 0.107,
+        },
+    }
+
+
+def make_full_product(code, name=None):
+    """Товар со всеми полями документа Open Food Facts (десятки килобайт)"""
+    product = make_product(code, name)
+    product["nutriments"].update({f"nutrient-{i}_{unit}": i * 0.1
+                                  for i in range(20) for unit in ("100g", "serving", "value", "unit")})
+    product["ingredients_text"] = "sugar, palm oil, hazelnuts, cocoa, skimmed milk powder, " * 20
+    product["ingredients"] = [{"id": f"en:ingredient-{i}", "text": f"ingredient {i}", "percent_estimate": i}
+                              for i in range(80)]
+    product["images"] = {f"{i}": {"sizes": {"100": {"h": 100, "w": 75}, "400": {"h": 400, "w": 300}},
+                                  "uploaded_t": 1500000000 + i, "uploader": "stub"} for i in range(120)}
+    product["categories_hierarchy"] = [f"en:category-{i}" for i in range(20)]
+    product["states_tags"] = [f"en:state-{i}" for i in range(25)]
+    return product
+
+
+def project(product, fields):
+    """Оставляет в товаре только поля из параметра fields"""
+    if not fields:
+        return product
+    return {key: product[key] for key in fields.split(",") if key in product}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, data, status=200):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body, compresslevel=6)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        self.server.requests_count += 1
+        if self.server.delay:
+            threading.Event().wait(self.server.delay)
+        if self.server.fail_every and self.server.requests_count % self.server.fail_every == 0:
+            self.send_json({"error": "stub failure"}, status=503)
+            return
+
+        fields = query.get("fields", [""])[0]
+        if url.path.startswith("/api/v0/product/") or url.path.startswith("/api/v2/product/"):
+            code = url.path.rsplit("/", 1)[-1].removesuffix(".json")
+            if code.isdigit():
+                self.send_json({"code": code, "status": 1, "status_verbose": "product found",
+                                "product": project(make_full_product(code), fields)})
+            else:
+                # API v2 отвечает на ненайденный товар кодом 404
+                status = 404 if url.path.startswith("/api/v2/") else 200
+                self.send_json({"code": code, "status": 0, "status_verbose": "product not found"}, status)
+        elif url.path in ("/cgi/search.pl", "/api/v2/search"):
+            terms = query.get("search_terms", [""])[0]
+            page = int(query.get("page", ["1"])[0])
+            page_size = int(query.get("page_size", ["20"])[0])
+            start = (page - 1) * page_size
+            products = [project(make_full_product(1000000 + i, f"{terms} {i}"), fields)
+                        for i in range(start, min(start + page_size, self.server.total))]
+            self.send_json({"count": self.server.total, "page": page, "page_size": page_size,
+                            "products": products})
+        else:
+            self.send_json({"error": "not found"}, status=404)
+
+
+class StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Клиент может закрыть соединение посреди ответа (отмена запроса)
+        pass
+
+
+class StubServer:
+    """
+    Заглушка в фоновом потоке: with StubServer() as base: ...
+    """
+
+    def __init__(self, delay=0.0, total=100, fail_every=0):
+        self.httpd = StubHTTPServer(("127.0.0.1", 0), StubHandler)
+        self.httpd.delay = delay
+        self.httpd.total = total
+        self.httpd.requests_count = 0
+        self.httpd.fail_every = fail_every
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def requests_count(self):
+        return self.httpd.requests_count
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,44 @@
+"""
+Ядро без Qt: запросы к Open Food Facts, кэши, поиск и пищевая ценность.
+
+Окна (main.py, pz5_menu.py, pz5_menu_2.py, pz5_menu_final.py), batch_lookup.py
+и lookup_cli.py берут логику отсюда. Модули загружаются при первом
+обращении к имени: import core занимает миллисекунды, requests, sqlite3 и
+numpy подгружаются, только когда нужны (python -m benchmarks.bench_import).
+
+    import core
+    core.get_product_by_barcode("3017620422003")
+    core.extract_kcal(product["nutriments"], product.get("serving_size"))
+"""
+import importlib
+
+# Имя -> модуль, из которого оно загружается
+_EXPORTS = {
+    "get_product_by_barcode": "core.products",
+    "fetch_product": "core.products",
+    "search_products": "core.products",
+    "search_text": "core.products",
+    "KCAL_FIELDS": "core.nutrition",
+    "extract_kcal": "core.nutrition",
+    "Lookup": "core.lookup",
+    "AsyncOFFClient": "core.async_client",
+    "Product": "core.product_record",
+    "products_from_dicts": "core.product_record",
+    "nutrition_table": "core.nutrients",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    # Следующие обращения - обычный атрибут модуля, без __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,140 @@
+"""
+Асинхронный клиент Open Food Facts (aiohttp).
+
+Асинхронные двойники core.get_product_by_barcode, core.search_products и
+поиска похожих товаров по категории (Lookup.find_similar_products). Товар
+по штрихкоду идёт тем же путём, что у потоков: офлайн-база, общий кэш
+товаров и общая группа singleflight - одинаковый запрос из потока и из
+корутины уходит к API один раз. Один клиент держит пул соединений с
+ограничением общего числа (limit) и числа соединений на хост
+(limit_per_host), поэтому тысячи задач не откроют тысячи сокетов.
+
+    async with AsyncOFFClient() as client:
+        results = await asyncio.gather(*(client.get_product_by_barcode(c) for c in codes))
+"""
+import asyncio
+
+import aiohttp
+
+from core import json_codec
+from core import off_client
+from core import offline_store
+from core import product_cache
+from core import singleflight
+from core.product_record import products_from_dicts
+
+
+class AsyncOFFClient:
+    """
+    limiter (off_client.RateLimiter) ограничивает частоту сетевых запросов,
+    ответы из кэша и офлайн-базы не ждут.
+    """
+
+    def __init__(self, base=None, limit=20, limit_per_host=8, timeout=15, limiter=None):
+        self.base = base
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.limiter = limiter
+        self._session = None
+
+    @property
+    def base_url(self):
+        return self.base or off_client.BASE
+
+    async def session(self) -> aiohttp.ClientSession:
+        """Сессия создаётся в работающем цикле событий при первом запросе"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host)
+            self._session = aiohttp.ClientSession(
+                connector=connector, headers=off_client.HEADERS, timeout=self.timeout)
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def wait_rate(self):
+        if self.limiter is not None:
+            # RateLimiter.wait спит - в пуле потоков, не в цикле событий
+            await asyncio.get_running_loop().run_in_executor(None, self.limiter.wait)
+
+    async def get_json(self, path, params=None, kind="other", allow_404=False) -> dict:
+        await self.wait_rate()
+        session = await self.session()
+        async with session.get(f"{self.base_url}{path}", params=params) as response:
+            # API v2 отвечает 404 с телом {"status": 0}, если товара нет
+            if not (allow_404 and response.status == 404):
+                response.raise_for_status()
+            body = await response.read()
+            # aiohttp отдаёт тело уже распакованным, сжатый размер - из Content-Length
+            off_client.add_traffic(kind, response.content_length or len(body), len(body))
+            return json_codec.loads(body)
+
+    async def get_product_by_barcode(self, barcode: str) -> dict:
+        """
+        Получение конкретного продукта по штрихкоду (API v2, поля профиля
+        detail): офлайн-база, общий кэш товаров, затем запрос к API.
+        """
+        store = offline_store.get_store()
+        if store is not None:
+            return store.lookup_barcode(barcode)
+        flights = singleflight.get_single_flight()
+        # Ключ тот же, что у core.get_product_by_barcode
+        return await product_cache.get_cache().get_or_fetch_async(
+            barcode, lambda code: flights.do_async(("barcode", code), self.fetch_product, code))
+
+    async def fetch_product(self, barcode: str) -> dict:
+        """Запрос продукта по штрихкоду к Open Food Facts, без кэшей"""
+        params = {"fields": off_client.fields("detail")}
+        return await self.get_json(f"/api/v2/product/{barcode}", params, kind="barcode", allow_404=True)
+
+    async def search_products(self, query: str, page_size=5, fields=None, lang="ru", country="ru") -> dict:
+        """
+        Поиск продуктов по тексту (Search API v2).
+        """
+        if fields is None:
+            fields = off_client.fields("detail")
+        params = {
+            "search_terms": query,
+            "fields": fields,
+            "page_size": page_size,
+            "lc": lang,
+            "cc": country,
+        }
+        return await self.get_json("/api/v2/search", params, kind="search")
+
+    async def find_similar_products(self, product) -> list:
+        """Товары из той же категории (записи Product), без самого товара"""
+        main_category = product.main_category
+        if not main_category:
+            return []
+        # Ключ и результат - как у Lookup.find_similar_products
+        similar_products = await singleflight.get_single_flight().do_async(
+            ("category", main_category), self.fetch_category, main_category)
+        return [p for p in similar_products if p.code != product.code]
+
+    async def fetch_category(self, category) -> list:
+        """Товары категории (одна страница поиска)"""
+        params = {
+            "search_terms": category,
+            "page_size": 10,
+            "json": 1,
+            "fields": off_client.fields("card"),
+        }
+        data = await self.get_json("/cgi/search.pl", params, kind="similar")
+        return products_from_dicts(data.get("products") or [])
+
+
+async def get_products_by_barcodes(barcodes, **client_options) -> list:
+    """Параллельный поиск нескольких штрихкодов одним клиентом"""
+    async with AsyncOFFClient(**client_options) as client:
+        return await asyncio.gather(*(client.get_product_by_barcode(code) for code in barcodes),
+                                    return_exceptions=True)
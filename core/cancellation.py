@@ -0,0 +1,27 @@
+"""
+Кооперативная отмена фоновых запросов.
+
+Поток не убивается (QThread.terminate оставляет сокет и состояние Python в
+неизвестном виде), а сам проверяет токен между шагами и завершается.
+"""
+import threading
+
+
+class Cancelled(Exception):
+    """Запрос прерван отменой токена"""
+
+
+class CancelToken:
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self):
+        if self._event.is_set():
+            raise Cancelled("запрос отменён")
@@ -0,0 +1,134 @@
+"""
+Разбор и сериализация JSON с подключаемой библиотекой.
+
+По умолчанию берётся самая быстрая из установленных: orjson для loads/dumps,
+msgspec для decode_product (разбирает только нужные поля товара и пропускает
+остальные без создания объектов). Без них - стандартный json.
+
+Выбор вручную: переменная окружения PZ5_JSON_BACKEND=json|orjson|msgspec
+или set_backend("json").
+"""
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# Поля товара, которые читает приложение (интерфейсы, batch_lookup, импорт дампа)
+PRODUCT_FIELDS = ("code", "product_name", "product_name_en", "brands", "categories",
+                  "quantity", "serving_size", "nutriments", "unique_scans_n")
+
+
+def _project(product) -> dict:
+    """Только PRODUCT_FIELDS, без пустых значений"""
+    if not isinstance(product, dict):
+        raise ValueError("JSON: ожидался объект товара")
+    return {field: product[field] for field in PRODUCT_FIELDS if product.get(field) is not None}
+
+
+def _json_loads(data):
+    return json.loads(data)
+
+
+def _json_dumps(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def _generic_decode_product(data) -> dict:
+    """Товар из JSON (bytes или str): словарь только с PRODUCT_FIELDS"""
+    return _project(loads(data))
+
+
+def _orjson_loads(data):
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # orjson не принимает целые больше 64 бит - такие ответы разбирает json
+        return json.loads(data)
+
+
+def _orjson_dumps(obj) -> str:
+    return orjson.dumps(obj).decode("utf-8")
+
+
+if msgspec is not None:
+    class ProductStruct(msgspec.Struct):
+        """
+        Типизированный разбор: поля вне PRODUCT_FIELDS пропускаются без разбора
+        значений. Значение не того типа (штрихкод-число, объект в nutriments) -
+        ошибка разбора, как у обрезанной строки: импорт дампа такую строку
+        пропускает. Товар без штрихкода разбирается (code = None).
+        """
+        code: str | None = None
+        product_name: str | None = None
+        product_name_en: str | None = None
+        brands: str | None = None
+        categories: str | None = None
+        quantity: str | None = None
+        serving_size: str | None = None
+        # Числа дампа бывают строками ("2250") - их переводит OfflineStore
+        nutriments: dict[str, float | str] | None = None
+        unique_scans_n: int | None = None
+
+    _product_decoder = msgspec.json.Decoder(ProductStruct)
+    _msgspec_encoder = msgspec.json.Encoder()
+
+    def _msgspec_loads(data):
+        try:
+            return msgspec.json.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+    def _msgspec_dumps(obj) -> str:
+        return _msgspec_encoder.encode(obj).decode("utf-8")
+
+    def _msgspec_decode_product(data) -> dict:
+        """Товар из JSON (bytes или str): словарь только с PRODUCT_FIELDS"""
+        try:
+            product = _product_decoder.decode(data)
+        except (msgspec.DecodeError, msgspec.ValidationError) as e:
+            # ValidationError - поле не того типа
+            raise ValueError(str(e)) from e
+        return {field: value for field in PRODUCT_FIELDS
+                if (value := getattr(product, field)) is not None}
+
+
+def available_backends() -> list:
+    """Установленные библиотеки JSON"""
+    return ["json"] + [name for name, module in (("orjson", orjson), ("msgspec", msgspec))
+                       if module is not None]
+
+
+def set_backend(backend=None):
+    """
+    Выбирает библиотеку: "json", "orjson", "msgspec" или None - самая быстрая
+    из установленных для каждой операции.
+    """
+    global BACKEND, loads, dumps, decode_product
+    if backend is not None and backend not in available_backends():
+        raise ValueError(f"Библиотека JSON не установлена: {backend}")
+
+    loads, dumps = _json_loads, _json_dumps
+    if backend in (None, "orjson") and orjson is not None:
+        loads, dumps = _orjson_loads, _orjson_dumps
+    elif backend == "msgspec" or (backend is None and msgspec is not None):
+        loads, dumps = _msgspec_loads, _msgspec_dumps
+
+    decode_product = _generic_decode_product
+    if backend in (None, "msgspec") and msgspec is not None:
+        decode_product = _msgspec_decode_product
+    BACKEND = backend or "+".join(available_backends()[1:]) or "json"
+
+
+BACKEND = "json"
+loads = _json_loads
+dumps = _json_dumps
+decode_product = _generic_decode_product
+set_backend(os.environ.get("PZ5_JSON_BACKEND") or None)
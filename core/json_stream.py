@@ -0,0 +1,114 @@
+"""
+Потоковый разбор JSON-ответа поиска.
+
+Ответ поиска - объект с массивом товаров {"count": ..., "products": [...]}.
+iter_items читает его по кускам и отдаёт товары по одному, как только
+товар пришёл целиком: в памяти одновременно один кусок ответа и один
+товар, а не всё тело и всё дерево словарей.
+
+    meta = {}
+    for product in iter_items(response.iter_content(65536), "products", meta):
+        ...
+    meta["count"]
+"""
+import codecs
+import json
+
+_decoder = json.JSONDecoder()
+
+WHITESPACE = " \t\n\r"
+DELIMITERS = WHITESPACE + ",:]}"
+
+# Сколько уже разобранного текста держать в буфере перед сдвигом
+COMPACT_THRESHOLD = 1 << 16
+
+
+class _Buffer:
+    """Текст ответа, дописываемый по кускам, с позицией разбора"""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def more(self) -> bool:
+        """Дочитывает следующий кусок; False - ответ закончился"""
+        if self.eof:
+            return False
+        if self.pos > COMPACT_THRESHOLD:
+            self.text = self.text[self.pos:]
+            self.pos = 0
+        for chunk in self.chunks:
+            if chunk:
+                self.text += self.utf8.decode(chunk) if isinstance(chunk, bytes) else chunk
+                return True
+        self.text += self.utf8.decode(b"", final=True)
+        self.eof = True
+        return False
+
+    def peek(self) -> str:
+        """Следующий значимый символ (пробелы пропускаются) или "" в конце ответа"""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.more():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        ch = self.peek()
+        if not ch or ch not in chars:
+            raise ValueError(f"JSON: ожидался один из {chars!r} в позиции {self.pos}, получено {ch!r}")
+        self.pos += 1
+        return ch
+
+    def value(self):
+        """Разбирает одно значение целиком, дочитывая куски по необходимости"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if self.more():
+                    continue
+                raise
+            # Значение закончено, только если за ним разделитель: число в конце
+            # буфера ("12", "1.", "1e") могло прийти не полностью
+            if self.eof or (end < len(self.text) and self.text[end] in DELIMITERS):
+                self.pos = end
+                return value
+            if not self.more():
+                self.pos = end
+                return value
+
+
+def iter_items(chunks, key="products", meta=None):
+    """
+    Генератор элементов массива key из JSON-объекта, приходящего кусками
+    (bytes или str). Остальные поля верхнего уровня попадают в meta.
+    """
+    buffer = _Buffer(chunks)
+    buffer.expect("{")
+    if buffer.peek() == "}":
+        return
+    while True:
+        name = buffer.value()
+        buffer.expect(":")
+        if name == key and buffer.peek() == "[":
+            buffer.pos += 1
+            if buffer.peek() == "]":
+                buffer.pos += 1
+            else:
+                while True:
+                    yield buffer.value()
+                    if buffer.expect(",]") == "]":
+                        break
+        else:
+            value = buffer.value()
+            if meta is not None:
+                meta[name] = value
+        if buffer.expect(",}") == "}":
+            return
@@ -0,0 +1,185 @@
+"""
+Поиск товаров без Qt: по штрихкоду, по названию и похожих товаров.
+
+Общая логика окна (pz5_menu_final.SearchTask) и командной строки
+(lookup_cli.py): кэш штрихкодов, кэш поиска, офлайн-база, объединение
+одинаковых запросов, потоковый разбор ответов. Товары - записи Product.
+
+    lookup = Lookup()
+    lookup.lookup_barcode("3017620422003")["product"].nutrition.kcal_100g
+    lookup.search_products_by_name("nutella")["products"]
+"""
+from core import off_client
+from core import offline_store
+from core import products
+from core import search_cache
+from core import singleflight
+from core.cancellation import CancelToken, Cancelled
+from core.name_matcher import NameMatcher
+from core.product_record import products_from_dicts
+
+# Поиск по названию: размер страницы и сколько страниц подгружать
+NAME_PAGE_SIZE = 15
+NAME_MAX_PAGES = 4
+
+
+class Lookup:
+    """
+    Запросы одного потока. token отменяет поиск по названию между страницами
+    и чтение ответа между кусками; limiter (off_client.RateLimiter) ограничивает частоту сетевых запросов -
+    ответы из кэшей и офлайн-базы не ждут.
+    """
+
+    def __init__(self, token=None, limiter=None):
+        self.token = token or CancelToken()
+        self.limiter = limiter
+
+    def wait_rate(self):
+        if self.limiter is not None:
+            self.limiter.wait()
+
+    def emit_batch(self, products):
+        """Очередная отфильтрованная страница поиска по названию (для показа по мере загрузки)"""
+
+    def lookup_barcode(self, barcode):
+        """Ответ API по штрихкоду, товар ("product") - запись Product"""
+        result = self.get_product_by_barcode(barcode)
+        if result.get("product"):
+            result = dict(result, product=products_from_dicts([result["product"]])[0])
+        return result
+
+    def get_product_by_barcode(self, barcode):
+        """Ответ API по штрихкоду (core.get_product_by_barcode), ошибка - {"error": ...}"""
+        print(f"🔍 Запрос штрихкода: {barcode}")
+        try:
+            data = products.get_product_by_barcode(barcode, self.limiter)
+        except Exception as e:
+            return {"error": f"Ошибка запроса: {str(e)}"}
+        print(f"📦 Статус продукта: {data.get('status_verbose', 'N/A')}")
+        return data
+
+    def search_products_by_name(self, query):
+        """
+        Поиск продуктов ТОЛЬКО по названию.
+        Страницы 1..NAME_MAX_PAGES загружаются по очереди, каждая отфильтрованная
+        страница сразу уходит в emit_batch (в окне - сигнал products_batch).
+        """
+        cache = search_cache.get_search_cache()
+        cached = cache.get(query)
+        if cached is not None:
+            print(f"💾 Поиск из кэша: '{query}' ({len(cached)} товаров)")
+            self.emit_batch(cached)
+            return {"products": cached, "count": len(cached)}
+
+        query = search_cache.normalize_query(query)
+        store = offline_store.get_store()
+        if store is not None:
+            found = products_from_dicts(store.search_names(query, limit=NAME_PAGE_SIZE * NAME_MAX_PAGES))
+            print(f"📴 Офлайн-поиск: '{query}' ({len(found)} товаров)")
+            cache.put(query, found)
+            self.emit_batch(found)
+            return {"products": found, "count": len(found)}
+
+        found_products = []
+        # Полный результат: API отдал всё, а не обрезан по NAME_MAX_PAGES
+        complete = False
+        # Страница после первой не загрузилась: результат неполный, в кэш не кладём
+        failed = False
+        for page in range(1, NAME_MAX_PAGES + 1):
+            if self.token.cancelled:
+                break
+            try:
+                filtered_products, received, count = singleflight.get_single_flight().do(
+                    ("name", query, page), self.fetch_name_page, query, page)
+            except Cancelled:
+                # Отменён этот поиск или чужой, к которому присоединились:
+                # результат неполный
+                failed = True
+                break
+            except Exception as e:
+                if page == 1:
+                    return {"error": f"Ошибка запроса: {str(e)}"}
+                print(f"⚠️ Страница {page} не загружена: {e}")
+                failed = True
+                break
+
+            print(f"🎯 Страница {page}: найдено {received}, по названию {len(filtered_products)}")
+            if filtered_products:
+                found_products.extend(filtered_products)
+                self.emit_batch(filtered_products)
+
+            if received < NAME_PAGE_SIZE or page * NAME_PAGE_SIZE >= count:
+                complete = True
+                break
+
+        if not self.token.cancelled and not failed:
+            cache.put(query, found_products, complete)
+        return {"products": found_products, "count": len(found_products)}
+
+    def fetch_name_page(self, query, page):
+        """
+        Одна страница поиска по названию: (товары с query в названии, получено
+        товаров, всего найдено). Ответ разбирается потоково, товары фильтруются
+        по мере прихода - страница целиком в памяти не хранится.
+        """
+        print(f"🔍 Поиск товара: '{query}', страница {page}")
+        self.wait_rate()
+        url = f"{off_client.BASE}/cgi/search.pl"
+        params = {
+            'search_terms': query,
+            'page': page,
+            'page_size': NAME_PAGE_SIZE,
+            'json': 1,
+            'search_simple': 1,
+            'sort_by': 'unique_scans_n',
+            # Первый найденный товар сразу показывается полной карточкой
+            'fields': off_client.fields("detail")
+        }
+
+        response = off_client.get(url, params=params, timeout=15, kind="search", stream=True)
+        print(f"📊 Статус ответа: {response.status_code}")
+        if response.status_code != 200:
+            response.close()
+            raise RuntimeError(f"HTTP ошибка: {response.status_code}")
+        # Фильтруем товары: оставляем только те, где название содержит искомое слово
+        matcher = NameMatcher(query)
+        meta = {}
+        received = 0
+        matched = []
+        for product in off_client.stream_items(response, "products", meta, kind="search", token=self.token):
+            received += 1
+            if matcher.matches(product):
+                matched.append(product)
+        # Пищевая ценность нормализуется сразу для всей страницы
+        return products_from_dicts(matched), received, int(meta.get("count") or 0)
+
+    def find_similar_products(self, product):
+        """Товары из той же категории, без текущего товара"""
+        main_category = product.main_category
+        if not main_category:
+            return []
+
+        # Все товары популярной категории ищут одно и то же - один запрос на всех
+        similar_products = singleflight.get_single_flight().do(
+            ("category", main_category), self.fetch_category, main_category)
+
+        # Убираем текущий продукт из похожих
+        return [p for p in similar_products if p.code != product.code]
+
+    def fetch_category(self, category):
+        """Товары категории (одна страница поиска)"""
+        print(f"🔍 Поиск похожих товаров: '{category}'")
+        self.wait_rate()
+        url = f"{off_client.BASE}/cgi/search.pl"
+        params = {
+            'search_terms': category,
+            'page_size': 10,
+            'json': 1,
+            'fields': off_client.fields("card")
+        }
+
+        response = off_client.get(url, params=params, timeout=10, kind="similar", stream=True)
+        if response.status_code != 200:
+            response.close()
+            raise RuntimeError(f"HTTP ошибка: {response.status_code}")
+        return products_from_dicts(off_client.stream_items(response, "products", kind="similar", token=self.token))
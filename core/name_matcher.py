@@ -0,0 +1,46 @@
+"""
+Фильтр товаров по названию для search_products_by_name.
+
+Товар подходит, если запрос входит в product_name или product_name_en
+(без учёта регистра). Проверки по отдельным словам названия, которые были
+в старом цикле, покрываются этой же проверкой подстроки.
+"""
+from functools import lru_cache
+
+
+@lru_cache(maxsize=65536)
+def fold_names(product_name, product_name_en) -> str:
+    """Названия товара в casefold, склеенные через перевод строки (кэшируется)"""
+    return f"{(product_name or '').casefold()}\n{(product_name_en or '').casefold()}"
+
+
+def product_haystack(product) -> str:
+    """Товар - словарь API или запись product_record.Product"""
+    if isinstance(product, dict):
+        return fold_names(product.get('product_name'), product.get('product_name_en'))
+    return fold_names(product.product_name, product.product_name_en)
+
+
+class NameMatcher:
+    """
+    Создаётся один раз на запрос: matcher = NameMatcher("milk")
+    """
+
+    def __init__(self, query: str):
+        self.query = query.casefold().strip()
+
+    def matches(self, product) -> bool:
+        return self.query in product_haystack(product)
+
+    def filter(self, products) -> list:
+        """Пакетная фильтрация списка товаров"""
+        query = self.query
+        if not query:
+            return list(products)
+        products = list(products)
+        if products and not isinstance(products[0], dict):
+            # Записи Product
+            return [product for product in products
+                    if query in fold_names(product.product_name, product.product_name_en)]
+        return [product for product in products
+                if query in fold_names(product.get('product_name'), product.get('product_name_en'))]
@@ -0,0 +1,139 @@
+"""
+Правила пищевой ценности без NumPy: ключи nutriments в API, масса порции
+из текста (parse_grams) и порядок расчёта калорийности.
+
+Правила записаны один раз и общие для одного товара (nutrition.extract_kcal,
+числа float) и для столбцов (nutrients.normalize, массивы NumPy): fill()
+получает операции isnan и where - SCALAR_OPS для чисел, numpy для массивов.
+Отсутствующее значение - NaN.
+"""
+import math
+import re
+from functools import lru_cache
+from types import SimpleNamespace
+
+# Нутриент (атрибут Nutrition, столбец nutrients) -> ключи nutriments в API
+# по приоритету (первое найденное значение)
+NUTRIENT_KEYS = {
+    "kcal_100g": ("energy-kcal_100g", "energy-kcal_value"),
+    "energy_kj_100g": ("energy-kj_100g", "energy_100g"),
+    "proteins_100g": ("proteins_100g",),
+    "fat_100g": ("fat_100g",),
+    "carbohydrates_100g": ("carbohydrates_100g",),
+    "sugars_100g": ("sugars_100g",),
+    "fiber_100g": ("fiber_100g",),
+    "salt_100g": ("salt_100g",),
+    "kcal_serving": ("energy-kcal_serving",),
+    "proteins_serving": ("proteins_serving",),
+    "fat_serving": ("fat_serving",),
+    "carbohydrates_serving": ("carbohydrates_serving",),
+    "sugars_serving": ("sugars_serving",),
+    "fiber_serving": ("fiber_serving",),
+    "salt_serving": ("salt_serving",),
+}
+
+# Нутриенты на 100 г, для которых считаются значения на порцию и на упаковку
+BASES = ("kcal", "proteins", "fat", "carbohydrates", "sugars", "fiber", "salt")
+
+# Откуда калорийность (Nutrition.kcal_source, столбец kcal_source)
+KCAL_MISSING = -1
+KCAL_LABEL = 0
+KCAL_FROM_KJ = 1
+KCAL_FROM_MACROS = 2
+# Источник калорийности в текстовых выгрузках (extract_kcal, lookup_cli.py)
+KCAL_SOURCE_NAMES = {KCAL_LABEL: "label", KCAL_FROM_KJ: "kj", KCAL_FROM_MACROS: "macros"}
+
+KJ_PER_KCAL = 4.184
+# Коэффициенты Атвотера, ккал на грамм
+KCAL_PER_GRAM = {"proteins_100g": 4.0, "fat_100g": 9.0, "carbohydrates_100g": 4.0}
+
+# Единица -> граммов (для жидкостей 1 мл считается за 1 г)
+UNIT_GRAMS = {
+    "mg": 0.001, "мг": 0.001, "g": 1.0, "gr": 1.0, "г": 1.0, "гр": 1.0, "kg": 1000.0, "кг": 1000.0,
+    "ml": 1.0, "мл": 1.0, "cl": 10.0, "dl": 100.0, "l": 1000.0, "л": 1000.0,
+    "oz": 28.3495, "floz": 29.5735, "lb": 453.592,
+}
+METRIC = {"mg", "мг", "g", "gr", "г", "гр", "kg", "кг", "ml", "мл", "cl", "dl", "l", "л"}
+_AMOUNT = re.compile(
+    r"(?:(\d+(?:\.\d+)?)\s*[x×*х]\s*)?(\d+(?:\.\d+)?)\s*"
+    r"(fl\.?\s*oz|mg|kg|gr|g|ml|cl|dl|l|oz|lb|мг|кг|гр|г|мл|л)(?![a-zа-я])")
+
+
+@lru_cache(maxsize=65536)
+def parse_grams(text) -> float:
+    """
+    Масса в граммах из serving_size/quantity: "330 ml" -> 330, "2 x 25 g" -> 50,
+    "1 portion (30 g)" -> 30. NaN, если не разобрать.
+    """
+    if not text:
+        return math.nan
+    text = re.sub(r"(\d),(\d)", r"\1.\2", str(text).casefold())
+    amounts = []
+    for count, amount, unit in _AMOUNT.findall(text):
+        unit = re.sub(r"[\s.]", "", unit)
+        amounts.append((unit in METRIC, float(count or 1) * float(amount) * UNIT_GRAMS[unit]))
+    if not amounts:
+        return math.nan
+    # "30 g (1 oz)" и "1 oz (28 g)" - метрическая масса точнее пересчёта
+    return max(amounts, key=lambda item: item[0])[1]
+
+
+def to_float(value) -> float:
+    """Одно значение API в float (NaN - нет значения или не число)"""
+    if value is None or value == "":
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def first_number(nutriments: dict, keys) -> float:
+    """Первое числовое значение по ключам API (NaN - нет ни одного)"""
+    for key in keys:
+        value = nutriments.get(key)
+        if value is None or value == "":
+            continue
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            continue
+        if not math.isnan(value):
+            return value
+    return math.nan
+
+
+def _where(condition, value, other):
+    return value if condition else other
+
+
+# Операции fill() для чисел float (для столбцов - модуль numpy)
+SCALAR_OPS = SimpleNamespace(isnan=math.isnan, where=_where)
+
+
+def fill(values: dict, serving_g=None, bases=BASES, ops=SCALAR_OPS) -> dict:
+    """
+    Дополняет values (нутриент -> число или столбец) на месте:
+    kcal_100g без этикетки - из кДж, затем по БЖУ (сумма по Атвотеру, только
+    если известны все три макронутриента), источник - values["kcal_source"];
+    с serving_g - пустые *_serving для bases из значений на 100 г.
+    """
+    kcal = values["kcal_100g"]
+    source = ops.where(ops.isnan(kcal), KCAL_MISSING, KCAL_LABEL)
+    estimates = (
+        (KCAL_FROM_KJ, values["energy_kj_100g"] / KJ_PER_KCAL),
+        (KCAL_FROM_MACROS, sum(values[name] * factor for name, factor in KCAL_PER_GRAM.items())),
+    )
+    for estimate_source, estimate in estimates:
+        missing = ops.isnan(kcal)
+        kcal = ops.where(missing, estimate, kcal)
+        # kcal == kcal: оценка есть (не NaN)
+        source = ops.where(missing & (kcal == kcal), estimate_source, source)
+    values["kcal_100g"] = kcal
+    values["kcal_source"] = source
+
+    if serving_g is not None:
+        for base in bases:
+            label = values[f"{base}_serving"]
+            values[f"{base}_serving"] = ops.where(ops.isnan(label), values[f"{base}_100g"] * serving_g / 100.0, label)
+    return values
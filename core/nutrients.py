@@ -0,0 +1,146 @@
+"""
+Пакетное извлечение пищевой ценности в столбцы NumPy.
+
+Для отчёта по десяткам тысяч товаров: вместо словаря на товар - по массиву
+на нутриент, отсутствующее значение - NaN.
+
+    columns = nutrient_columns(product["nutriments"] for product in products)
+    columns["kcal_100g"].mean()  # np.nanmean для пропусков
+
+normalize() дополняет столбцы: калорийность из кДж или по БЖУ (4/9/4), если
+на этикетке её нет, и значения на порцию и на упаковку по serving_size и
+quantity ("330 ml", "2 x 25 g"). nutrition_table() - всё сразу для товаров.
+Правила расчёта - nutrient_rules.fill, те же у extract_kcal (core.nutrition)
+для одного товара.
+"""
+from itertools import chain
+
+import numpy as np
+
+from core import nutrient_rules
+from core.nutrient_rules import BASES, KCAL_MISSING, parse_grams, to_float
+
+# Столбец (он же атрибут Nutrition) -> ключи nutriments в API по приоритету
+COLUMNS = nutrient_rules.NUTRIENT_KEYS
+
+
+def grams_column(texts) -> np.ndarray:
+    """parse_grams для столбца строк (повторы разбираются один раз)"""
+    texts = list(texts)
+    return np.fromiter((parse_grams(text) for text in texts), dtype=np.float64, count=len(texts))
+
+
+# Все ключи nutriments, которые читают столбцы (по одному разу)
+KEYS = tuple(dict.fromkeys(key for keys in COLUMNS.values() for key in keys))
+_MISSING = (np.nan,) * len(KEYS)
+
+
+def _float_array(values: list, count) -> np.ndarray:
+    """Значения API в float64: числа-строки -> числа, None и нечисловые строки -> NaN"""
+    try:
+        return np.fromiter(values, dtype=np.float64, count=count)
+    except (TypeError, ValueError):
+        return np.fromiter((to_float(value) for value in values), dtype=np.float64, count=count)
+
+
+def nutrient_columns(nutriments_list) -> dict:
+    """
+    Столбцы COLUMNS (float64, NaN - нет значения) для последовательности
+    словарей nutriments (None допускается).
+    """
+    nutriments_list = [nutriments or {} for nutriments in nutriments_list]
+    count = len(nutriments_list)
+    # Значения всех KEYS товара одним map(dict.get) - без цикла по ключам в Python;
+    # пропуски сразу NaN
+    flat = list(chain.from_iterable(map(nutriments.get, KEYS, _MISSING) for nutriments in nutriments_list))
+    table = _float_array(flat, count * len(KEYS)).reshape(count, len(KEYS)).T
+    index = {key: i for i, key in enumerate(KEYS)}
+    columns = {}
+    for column, keys in COLUMNS.items():
+        values = table[index[keys[0]]]
+        for key in keys[1:]:
+            values = np.where(np.isnan(values), table[index[key]], values)
+        columns[column] = np.ascontiguousarray(values)
+    return columns
+
+
+def product_columns(products) -> dict:
+    """
+    Столбцы COLUMNS для товаров: словарей API (с nutriments) или записей
+    Product.
+    """
+    products = list(products)
+    if not products or isinstance(products[0], dict):
+        return nutrient_columns(product.get("nutriments") for product in products)
+    columns = {}
+    for column in COLUMNS:
+        values = [getattr(product.nutrition, column) for product in products]
+        columns[column] = _float_array([np.nan if value is None else value for value in values], len(values))
+    return columns
+
+
+def normalize(columns: dict, serving_sizes=None, quantities=None) -> dict:
+    """
+    Новый словарь столбцов: kcal_100g дополнен из кДж, затем по БЖУ
+    (источник - kcal_source); с serving_sizes - serving_g и пустые *_serving
+    из значений на 100 г; с quantities - package_g и *_package.
+    """
+    columns = dict(columns)
+    serving_g = None
+    if serving_sizes is not None:
+        serving_g = columns["serving_g"] = grams_column(serving_sizes)
+    nutrient_rules.fill(columns, serving_g, ops=np)
+    columns["kcal_source"] = np.asarray(columns["kcal_source"], dtype=np.int8)
+
+    if quantities is not None:
+        package_g = grams_column(quantities)
+        columns["package_g"] = package_g
+        for base in BASES:
+            columns[f"{base}_package"] = columns[f"{base}_100g"] * package_g / 100.0
+    return columns
+
+
+def nutrition_table(products) -> dict:
+    """
+    Нормализованные столбцы (normalize) для товаров: словарей API или
+    записей Product, с порцией и упаковкой.
+    """
+    products = list(products)
+    if products and not isinstance(products[0], dict):
+        serving_sizes = [product.serving_size for product in products]
+        quantities = [product.quantity for product in products]
+    else:
+        serving_sizes = [product.get("serving_size") for product in products]
+        quantities = [product.get("quantity") for product in products]
+    return normalize(product_columns(products), serving_sizes, quantities)
+
+
+def fill_records(products) -> list:
+    """
+    Дополняет Nutrition записей Product по nutrition_table: калорийность
+    (и kcal_source), пустые значения на порцию, массы и значения на упаковку.
+    """
+    products = list(products)
+    if not products:
+        return products
+    table = nutrition_table(products)
+    kcal_source = table["kcal_source"].tolist()
+    # Столбцы в списки один раз - NaN -> None при записи атрибутов
+    values = {column: table[column].tolist() for column in COLUMNS}
+    record_fields = set(values)
+    for column in ("serving_g", "package_g", "kcal_package", "proteins_package", "fat_package",
+                   "carbohydrates_package"):
+        values[column] = table[column].tolist()
+    for i, product in enumerate(products):
+        nutrition = product.nutrition
+        estimated = []
+        for attribute, column in values.items():
+            value = column[i]
+            if value != value:
+                value = None
+            elif getattr(nutrition, attribute) is None and attribute in record_fields:
+                estimated.append(attribute)
+            setattr(nutrition, attribute, value)
+        nutrition.estimated = tuple(estimated) or None
+        nutrition.kcal_source = kcal_source[i] if kcal_source[i] != KCAL_MISSING else None
+    return products
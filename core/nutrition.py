@@ -0,0 +1,47 @@
+"""
+Калорийность и БЖУ одного товара (бывшая main.extract_kcal). Для многих
+товаров сразу - nutrients.nutrition_table.
+"""
+import math
+
+from core import nutrient_rules
+from core.nutrient_rules import KCAL_SOURCE_NAMES, NUTRIENT_KEYS, first_number, parse_grams
+
+# Ключ результата extract_kcal (как в main.extract_kcal и столбцах batch_lookup)
+# -> нутриент nutrient_rules.NUTRIENT_KEYS
+KCAL_FIELDS = {
+    "kcal_100g": "kcal_100g",
+    "protein_100g": "proteins_100g",
+    "fat_100g": "fat_100g",
+    "carbs_100g": "carbohydrates_100g",
+    "kcal_serving": "kcal_serving",
+    "protein_serving": "proteins_serving",
+    "fat_serving": "fat_serving",
+    "carbs_serving": "carbohydrates_serving",
+}
+
+
+def extract_kcal(nutriments: dict, serving_size=None, with_source=False) -> dict:
+    """
+    Извлекает калорийность и БЖУ.
+    Возвращает значения на 100 г и на порцию (если доступно или если известен
+    serving_size). Калорийность без этикетки - из кДж или по БЖУ; with_source -
+    добавить, откуда она (kcal_source, для выгрузок).
+
+    Те же правила, что nutrients.normalize (nutrient_rules.fill), но без
+    массивов NumPy: для одного товара это в несколько раз быстрее
+    (python -m benchmarks.bench_nutrients).
+    """
+    nutriments = nutriments or {}
+    values = {name: first_number(nutriments, NUTRIENT_KEYS[name]) for name in _NUTRIENTS}
+    nutrient_rules.fill(values, parse_grams(serving_size), _BASES)
+
+    data = {field: values[name] for field, name in KCAL_FIELDS.items() if not math.isnan(values[name])}
+    if with_source and "kcal_100g" in data:
+        data["kcal_source"] = KCAL_SOURCE_NAMES[values["kcal_source"]]
+    return data
+
+
+# Нутриенты, которые нужны extract_kcal
+_BASES = ("kcal", "proteins", "fat", "carbohydrates")
+_NUTRIENTS = tuple(KCAL_FIELDS.values()) + ("energy_kj_100g",)
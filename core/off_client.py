@@ -0,0 +1,214 @@
+"""
+Общий HTTP-клиент для Open Food Facts.
+
+Все запросы (main.py, pz5_menu_2.py, pz5_menu_final.py) идут через один
+requests.Session с пулом keep-alive соединений, поэтому DNS + TCP + TLS
+выполняются один раз на соединение, а не на каждый запрос.
+
+Запросы товаров ограничивают поля ответа профилем (fields("card") и т.д.):
+без fields API отдаёт весь документ товара, часто сотни килобайт. Ответы
+приходят сжатыми (gzip, br - если установлен brotli). Объём ответов по
+типам запросов, до и после распаковки - traffic_stats().
+
+Большие ответы поиска можно разбирать потоково: stream_items().
+"""
+import os
+import threading
+import time
+from collections import defaultdict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core import json_stream
+
+# urllib3 и aiohttp распаковывают br, только если установлен brotli
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+DEFAULT_BASE = "https://world.openfoodfacts.org"
+# Адрес API; PZ5_OFF_BASE - например, локальный lookup_service.py
+BASE = os.environ.get("PZ5_OFF_BASE", DEFAULT_BASE).rstrip("/")
+
+# Сжатие ответа: только те алгоритмы, которые клиент умеет распаковать
+ACCEPT_ENCODING = "gzip, deflate, br" if brotli else "gzip, deflate"
+
+HEADERS = {
+    "User-Agent": "Darcons-Trade-CalorieFetcher/1.0 (+https://darcons-trade.example)",
+    "Accept-Encoding": ACCEPT_ENCODING,
+}
+
+# Размер куска при потоковом чтении ответа
+CHUNK_SIZE = 64 * 1024
+
+# Размер пула: сколько соединений к одному хосту держим открытыми
+# (должен быть не меньше числа одновременно работающих потоков)
+POOL_SIZE = 10
+
+# Профили полей ответа (параметр fields API v2 и cgi/search.pl)
+FIELD_PROFILES = {
+    # Карточка в списке похожих товаров
+    "card": ("code", "product_name", "product_name_en", "brands", "quantity", "nutriments"),
+    # Полная карточка: всё, что показывает display_single_product, и категория
+    # для поиска похожих товаров (штрихкод, поиск по названию)
+    "detail": ("code", "product_name", "product_name_en", "brands", "quantity",
+               "serving_size", "categories", "nutriments"),
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+_traffic = defaultdict(lambda: {"requests": 0, "wire_bytes": 0, "body_bytes": 0})
+_traffic_lock = threading.Lock()
+
+
+def fields(profile: str) -> str:
+    """Значение параметра fields для профиля ("card" или "detail")"""
+    return ",".join(FIELD_PROFILES[profile])
+
+
+def make_session(pool_size: int = POOL_SIZE) -> requests.Session:
+    """
+    Создаёт новую сессию с пулом соединений и общими заголовками.
+    """
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+    Возвращает общую для всего приложения сессию (создаётся при первом вызове).
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = make_session()
+    return _session
+
+
+def configure(pool_size: int = POOL_SIZE):
+    """
+    Пересоздаёт общую сессию с другим размером пула.
+    """
+    global _session
+    with _session_lock:
+        old, _session = _session, make_session(pool_size)
+    if old is not None:
+        old.close()
+
+
+def get(url: str, params=None, timeout=15, kind="other", stream=False) -> requests.Response:
+    """
+    GET-запрос через общую сессию. kind - тип запроса для traffic_stats().
+    stream=True - тело не читается сразу, его разбирает stream_items().
+    """
+    response = get_session().get(url, params=params, timeout=timeout, stream=stream)
+    if not stream:
+        record_traffic(kind, response)
+    return response
+
+
+class RateLimiter:
+    """Ограничение частоты запросов (общее для всех потоков): wait() перед запросом"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def stream_items(response: requests.Response, key="products", meta=None, kind="other", token=None):
+    """
+    Генератор элементов массива key из ответа get(..., stream=True) по мере
+    загрузки (см. json_stream.iter_items). В конце учитывается трафик и
+    ответ закрывается: дочитанное соединение возвращается в пул.
+    token (CancelToken) проверяется между кусками: после отмены чтение
+    прерывается исключением Cancelled, недочитанный ответ не разбирается.
+    """
+    body = 0
+
+    def chunks():
+        nonlocal body
+        for chunk in response.iter_content(CHUNK_SIZE):
+            if token is not None:
+                token.check()
+            body += len(chunk)
+            yield chunk
+
+    try:
+        yield from json_stream.iter_items(chunks(), key, meta)
+    finally:
+        try:
+            wire = response.raw.tell() or body
+        except (AttributeError, OSError):
+            wire = body
+        add_traffic(kind, wire, body)
+        response.close()
+
+
+def record_traffic(kind: str, response: requests.Response):
+    """
+    Учитывает размер ответа: wire_bytes - сколько пришло по сети (сжатым),
+    body_bytes - размер распакованного тела.
+    """
+    body = len(response.content)
+    try:
+        wire = response.raw.tell() or body
+    except (AttributeError, OSError):
+        wire = body
+    add_traffic(kind, wire, body)
+
+
+def add_traffic(kind: str, wire_bytes: int, body_bytes: int):
+    """Учёт ответа, полученного не через get() (например, aiohttp)"""
+    with _traffic_lock:
+        stats = _traffic[kind]
+        stats["requests"] += 1
+        stats["wire_bytes"] += wire_bytes
+        stats["body_bytes"] += body_bytes
+
+
+def traffic_stats() -> dict:
+    """
+    Объём ответов по типам запросов: {kind: {"requests", "wire_bytes",
+    "body_bytes", "avg_bytes"}}; wire_bytes / body_bytes - степень сжатия.
+    """
+    with _traffic_lock:
+        return {kind: dict(stats, avg_bytes=stats["wire_bytes"] // stats["requests"])
+                for kind, stats in _traffic.items()}
+
+
+def reset_traffic():
+    with _traffic_lock:
+        _traffic.clear()
+
+
+def close():
+    """
+    Закрывает общую сессию и все её соединения.
+    """
+    global _session
+    with _session_lock:
+        old, _session = _session, None
+    if old is not None:
+        old.close()
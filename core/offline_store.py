@@ -0,0 +1,287 @@
+"""
+Офлайн-режим: локальная копия дампа Open Food Facts с индексом по штрихкоду.
+
+Импорт (потоковый, дамп целиком в память не читается):
+    python -m core.offline_store import openfoodfacts-products.jsonl.gz
+    python -m core.offline_store import en.openfoodfacts.org.products.csv.gz --db off.sqlite3
+
+После импорта строится полнотекстовый индекс по названию и бренду:
+    python -m core.offline_store search "молоко 3"
+
+Включение офлайн-режима: переменная окружения PZ5_BACKEND=offline
+(путь к базе - PZ5_OFFLINE_DB) или set_backend("offline").
+"""
+import argparse
+import csv
+import gzip
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+from core import json_codec
+from core import search_cache
+from core.nutrient_rules import NUTRIENT_KEYS
+
+DEFAULT_DB = os.path.join(os.path.expanduser("~"), ".cache", "pz5", "off_dump.sqlite3")
+
+# Длины префиксов, для которых FTS5 хранит отдельный индекс
+MAX_PREFIX = 8
+
+# Поля товара, которые используют интерфейсы
+PRODUCT_FIELDS = ("code", "product_name", "product_name_en", "brands", "categories",
+                  "quantity", "serving_size")
+
+# Нутриенты, которые используют интерфейсы (extract_kcal, display_single_product)
+NUTRIENT_FIELDS = tuple(key for keys in NUTRIENT_KEYS.values() for key in keys)
+
+
+def compact_product(product: dict) -> dict:
+    """Оставляет только нужные поля товара из дампа"""
+    compact = {}
+    for field in PRODUCT_FIELDS:
+        value = product.get(field)
+        if value not in (None, ""):
+            compact[field] = value
+    nutriments = product.get("nutriments")
+    if nutriments is None:
+        # В CSV-дампе нутриенты лежат в отдельных колонках
+        nutriments = product
+    compact_nutriments = {}
+    for field in NUTRIENT_FIELDS:
+        value = nutriments.get(field)
+        if value in (None, ""):
+            continue
+        if isinstance(value, str):
+            try:
+                value = float(value)
+            except ValueError:
+                continue
+        compact_nutriments[field] = value
+    compact["nutriments"] = compact_nutriments
+    return compact
+
+
+def product_scans(product: dict) -> int:
+    """Популярность товара (unique_scans_n), по ней сортируется поиск"""
+    try:
+        return int(product.get("unique_scans_n") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def name_match_expression(query: str, prefix=True) -> str:
+    """
+    Запрос FTS5: все слова должны встретиться, каждое - как префикс слова
+    (prefix=True) или целиком. Слова длиннее MAX_PREFIX ищутся целиком:
+    для них нет префиксного индекса, а набраны они обычно полностью.
+    """
+    tokens = re.findall(r"\w+", search_cache.normalize_query(query))
+    return " ".join(f'"{token}"*' if prefix and len(token) <= MAX_PREFIX else f'"{token}"'
+                    for token in tokens)
+
+
+def _open_dump(path, binary=False):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb") if binary else gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "rb") if binary else open(path, "r", encoding="utf-8", newline="")
+
+
+def iter_dump(path):
+    """Потоково читает товары из JSONL или CSV (TSV) дампа Open Food Facts"""
+    name = path[:-3] if path.endswith(".gz") else path
+    if name.endswith((".csv", ".tsv")):
+        with _open_dump(path) as f:
+            csv.field_size_limit(sys.maxsize)
+            # CSV-дамп Open Food Facts разделён табуляцией
+            yield from csv.DictReader(f, delimiter="\t", quoting=csv.QUOTE_NONE)
+        return
+    # JSONL читается байтами: orjson/msgspec разбирают их без перекодирования в str
+    with _open_dump(path, binary=True) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    # Из документа товара разбираются только нужные поля
+                    yield json_codec.decode_product(line)
+                except ValueError:
+                    continue
+
+
+class OfflineStore:
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # Первичный ключ по code - это и есть индекс по штрихкоду
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS products (code TEXT PRIMARY KEY, data TEXT NOT NULL, "
+            "scans INTEGER NOT NULL DEFAULT 0) WITHOUT ROWID")
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(products)")]
+        if "scans" not in columns:
+            self._db.execute("ALTER TABLE products ADD COLUMN scans INTEGER NOT NULL DEFAULT 0")
+
+    def get(self, code):
+        """Товар по штрихкоду или None"""
+        with self._lock:
+            row = self._db.execute("SELECT data FROM products WHERE code = ?", (code,)).fetchone()
+        return json_codec.loads(row[0]) if row else None
+
+    def lookup_barcode(self, code) -> dict:
+        """Ответ в формате API Open Food Facts (/api/v0/product/<code>.json)"""
+        product = self.get(code)
+        if product is None:
+            return {"code": code, "status": 0, "status_verbose": "product not found"}
+        return {"code": code, "status": 1, "status_verbose": "product found", "product": product}
+
+    def import_dump(self, dump_path, batch_size=5000, progress=None, build_index=True) -> int:
+        """
+        Потоковый импорт дампа пачками по batch_size. Возвращает число товаров.
+        """
+        count = 0
+        batch = []
+        with self._lock:
+            self._db.execute("PRAGMA synchronous=OFF")
+            for product in iter_dump(dump_path):
+                code = product.get("code")
+                if not code:
+                    continue
+                data = json_codec.dumps(compact_product(product))
+                batch.append((str(code), data, product_scans(product)))
+                if len(batch) >= batch_size:
+                    count += self._write(batch)
+                    batch = []
+                    if progress:
+                        progress(count)
+            if batch:
+                count += self._write(batch)
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        if build_index:
+            self.build_name_index()
+        return count
+
+    def _write(self, batch):
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO products (code, data, scans) VALUES (?, ?, ?)", batch)
+        return len(batch)
+
+    def build_name_index(self) -> int:
+        """
+        Перестраивает инвертированный индекс по product_name/product_name_en/brands.
+
+        rowid в индексе - место товара по популярности (unique_scans_n), поэтому
+        совпадения читаются уже отсортированными и LIMIT не требует сортировки.
+        """
+        with self._lock, self._db:
+            self._db.execute("DROP TABLE IF EXISTS names")
+            self._db.execute("DROP TABLE IF EXISTS name_rank")
+            prefixes = " ".join(str(n) for n in range(1, MAX_PREFIX + 1))
+            self._db.execute(
+                "CREATE VIRTUAL TABLE names USING fts5(name, name_en, brands, content='', "
+                f"prefix='{prefixes}')")
+            self._db.execute("CREATE TABLE name_rank (rank INTEGER PRIMARY KEY, code TEXT NOT NULL)")
+            self._db.execute("INSERT INTO name_rank (code) SELECT code FROM products ORDER BY scans DESC")
+            self._db.execute("""
+                INSERT INTO names (rowid, name, name_en, brands)
+                SELECT r.rank,
+                       json_extract(p.data, '$.product_name'),
+                       json_extract(p.data, '$.product_name_en'),
+                       json_extract(p.data, '$.brands')
+                FROM name_rank r JOIN products p ON p.code = r.code""")
+            return self._db.execute("SELECT COUNT(*) FROM name_rank").fetchone()[0]
+
+    def search_names(self, query, limit=15, prefix=True) -> list:
+        """
+        Поиск по названию и бренду в локальном индексе, популярные товары первыми.
+        """
+        expression = name_match_expression(query, prefix)
+        if not expression:
+            return []
+        with self._lock:
+            rows = self._db.execute("""
+                SELECT p.data FROM names
+                JOIN name_rank r ON r.rank = names.rowid
+                JOIN products p ON p.code = r.code
+                WHERE names MATCH ? ORDER BY names.rowid LIMIT ?""", (expression, limit)).fetchall()
+        return [json_codec.loads(row[0]) for row in rows]
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_backend = os.environ.get("PZ5_BACKEND", "online")
+_store = None
+_store_lock = threading.Lock()
+
+
+def set_backend(backend: str, path=None):
+    """Переключает источник данных для штрихкодов: "online" или "offline" """
+    global _backend, _store
+    if backend not in ("online", "offline"):
+        raise ValueError(f"Неизвестный режим: {backend}")
+    with _store_lock:
+        _backend = backend
+        if path is not None:
+            _store = OfflineStore(path)
+
+
+def get_store():
+    """Локальная база, если включён офлайн-режим, иначе None"""
+    global _store
+    if _backend != "offline":
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = OfflineStore(os.environ.get("PZ5_OFFLINE_DB", DEFAULT_DB))
+    return _store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Локальная копия дампа Open Food Facts")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="импорт JSONL/CSV дампа (можно .gz)")
+    imp.add_argument("dump")
+    imp.add_argument("--db", default=os.environ.get("PZ5_OFFLINE_DB", DEFAULT_DB))
+    imp.add_argument("--batch-size", type=int, default=5000)
+    get = sub.add_parser("get", help="товар по штрихкоду")
+    get.add_argument("code")
+    get.add_argument("--db", default=os.environ.get("PZ5_OFFLINE_DB", DEFAULT_DB))
+    search = sub.add_parser("search", help="поиск по названию в локальном индексе")
+    search.add_argument("query")
+    search.add_argument("--limit", type=int, default=15)
+    search.add_argument("--db", default=os.environ.get("PZ5_OFFLINE_DB", DEFAULT_DB))
+    index = sub.add_parser("index", help="перестроить индекс по названиям")
+    index.add_argument("--db", default=os.environ.get("PZ5_OFFLINE_DB", DEFAULT_DB))
+    args = parser.parse_args(argv)
+
+    store = OfflineStore(args.db)
+    if args.command == "import":
+        start = time.perf_counter()
+        count = store.import_dump(args.dump, args.batch_size,
+                                  progress=lambda n: print(f"📦 Импортировано: {n}", end="\r"))
+        print(f"✅ Импортировано товаров: {count} за {time.perf_counter() - start:.1f} с -> {args.db}")
+    elif args.command == "index":
+        print(f"✅ Проиндексировано товаров: {store.build_name_index()}")
+    elif args.command == "search":
+        for product in store.search_names(args.query, args.limit):
+            print(f"{product.get('code')}\t{product.get('product_name', '')}\t{product.get('brands', '')}")
+    else:
+        print(json.dumps(store.lookup_barcode(args.code), ensure_ascii=False, indent=2))
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
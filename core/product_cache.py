@@ -0,0 +1,243 @@
+"""
+Локальный кэш товаров по штрихкоду (SQLite).
+
+- TTL: запись считается свежей ttl секунд;
+- stale-while-revalidate: устаревшая запись (но моложе max_stale) отдаётся
+  сразу, а обновление идёт в фоне;
+- LRU: при превышении max_entries удаляются давно не использованные записи;
+- счётчики попаданий/промахов в stats().
+
+get_or_fetch_async - то же для корутины fetch (core.async_client).
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+
+from core import json_codec
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "pz5", "products.sqlite3")
+DEFAULT_TTL = 24 * 3600           # сутки
+DEFAULT_MAX_STALE = 30 * 24 * 3600  # месяц
+DEFAULT_MAX_ENTRIES = 50000
+
+
+class ProductCache:
+    def __init__(self, path=DEFAULT_PATH, ttl=DEFAULT_TTL, max_stale=DEFAULT_MAX_STALE,
+                 max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.max_entries = max_entries
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS products (
+                barcode TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                used_at REAL NOT NULL
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS products_used_at ON products(used_at)")
+        self._count = self._db.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+        self._refreshing = set()
+        self._tasks = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def get(self, barcode):
+        """
+        Возвращает (data, fetched_at) или None, отмечая использование записи.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data, fetched_at FROM products WHERE barcode = ?", (barcode,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE products SET used_at = ? WHERE barcode = ?", (now, barcode))
+        return json_codec.loads(row[0]), row[1]
+
+    def contains(self, barcode) -> bool:
+        """Есть ли запись; только чтение - использование не отмечается (LRU)"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM products WHERE barcode = ?", (barcode,)).fetchone()
+        return row is not None
+
+    def servable(self, barcode) -> bool:
+        """
+        Ответит ли get_or_fetch из кэша, без запроса к API (свежая или
+        устаревшая, но не старше max_stale запись). Только чтение, без счётчиков.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT fetched_at FROM products WHERE barcode = ?", (barcode,)).fetchone()
+        return row is not None and time.time() - row[0] < self.max_stale
+
+    def put(self, barcode, data):
+        """Сохраняет ответ API и при необходимости вытесняет старые записи"""
+        now = time.time()
+        payload = json_codec.dumps(data)
+        with self._lock:
+            existed = self._db.execute(
+                "SELECT 1 FROM products WHERE barcode = ?", (barcode,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO products (barcode, data, fetched_at, used_at) VALUES (?, ?, ?, ?)",
+                (barcode, payload, now, now))
+            if not existed:
+                self._count += 1
+            if self._count > self.max_entries:
+                self._evict(self._count - self.max_entries)
+
+    def _evict(self, n):
+        # Вызывается под self._lock
+        self._db.execute(
+            "DELETE FROM products WHERE barcode IN "
+            "(SELECT barcode FROM products ORDER BY used_at LIMIT ?)", (n,))
+        self._count -= n
+
+    def get_or_fetch(self, barcode, fetch):
+        """
+        Ответ из кэша или от fetch(barcode).
+
+        Свежая запись отдаётся сразу; устаревшая - сразу, с фоновым обновлением;
+        слишком старая или отсутствующая - запрашивается через fetch. Если
+        fetch падает, а в кэше есть хоть какая-то запись, отдаётся она.
+        """
+        cached, state = self._lookup(barcode)
+        if state == "fresh":
+            return cached[0]
+        if state == "stale":
+            self._refresh_in_background(barcode, fetch)
+            return cached[0]
+        try:
+            data = fetch(barcode)
+        except Exception:
+            if cached is not None:
+                return cached[0]
+            raise
+        self._store(barcode, data)
+        return data
+
+    async def get_or_fetch_async(self, barcode, fetch):
+        """
+        get_or_fetch для корутины fetch(barcode): устаревшая запись обновляется
+        задачей asyncio, а не потоком. Запросы к SQLite короткие и идут прямо
+        в цикле событий.
+        """
+        cached, state = self._lookup(barcode)
+        if state == "fresh":
+            return cached[0]
+        if state == "stale":
+            self._refresh_async(barcode, fetch)
+            return cached[0]
+        try:
+            data = await fetch(barcode)
+        except Exception:
+            if cached is not None:
+                return cached[0]
+            raise
+        self._store(barcode, data)
+        return data
+
+    def _lookup(self, barcode):
+        """
+        (запись или None, состояние) с учётом счётчиков: "fresh" - отдать,
+        "stale" - отдать и обновить, "fetch" - запросить.
+        """
+        cached = self.get(barcode)
+        if cached is not None:
+            age = time.time() - cached[1]
+            if age < self.ttl:
+                self.hits += 1
+                return cached, "fresh"
+            if age < self.max_stale:
+                self.stale_hits += 1
+                return cached, "stale"
+        self.misses += 1
+        return cached, "fetch"
+
+    def _store(self, barcode, data):
+        # Кэшируем только найденные товары
+        if data.get("status") == 1 and data.get("product"):
+            self.put(barcode, data)
+
+    def _refresh_in_background(self, barcode, fetch):
+        with self._lock:
+            if barcode in self._refreshing:
+                return
+            self._refreshing.add(barcode)
+
+        def refresh():
+            try:
+                self._store(barcode, fetch(barcode))
+            except Exception as e:
+                print(f"⚠️ Не удалось обновить кэш для {barcode}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(barcode)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def _refresh_async(self, barcode, fetch):
+        with self._lock:
+            if barcode in self._refreshing:
+                return
+            self._refreshing.add(barcode)
+
+        async def refresh():
+            try:
+                self._store(barcode, await fetch(barcode))
+            except Exception as e:
+                print(f"⚠️ Не удалось обновить кэш для {barcode}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(barcode)
+
+        task = asyncio.get_running_loop().create_task(refresh())
+        # Цикл событий держит на задачи только слабые ссылки
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def stats(self) -> dict:
+        """Счётчики кэша"""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": self._count,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM products")
+            self._count = 0
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> ProductCache:
+    """Общий для приложения кэш (путь можно задать переменной PZ5_CACHE_PATH)"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ProductCache(os.environ.get("PZ5_CACHE_PATH", DEFAULT_PATH))
+    return _cache
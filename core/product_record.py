@@ -0,0 +1,119 @@
+"""
+Компактная запись товара вместо словаря из ответа API.
+
+Product/Nutrition создаются один раз после разбора ответа и хранят только
+то, что показывает интерфейс (display_single_product, карточка в списке) и
+считает extract_kcal. Нутриенты - float или None, без строк и без сотни
+ненужных ключей nutriments.
+
+    product = Product.from_dict(data["product"])
+    product.nutrition.kcal_100g
+
+products_from_dicts() для списков: вдобавок заполняет калорийность из кДж
+или по БЖУ и значения на порцию и упаковку (nutrients.normalize).
+"""
+from core.nutrient_rules import NUTRIENT_KEYS, first_number
+
+
+class Nutrition:
+    """Пищевая ценность на 100 г и на порцию"""
+
+    # Атрибут -> ключи nutriments в API (первый найденный)
+    FIELDS = NUTRIENT_KEYS
+    # Расчётные значения (nutrients.fill_records), в nutriments не сохраняются:
+    # посчитанные поля FIELDS, источник калорийности (nutrient_rules.KCAL_*), масса
+    # порции и упаковки в граммах, значения на упаковку
+    DERIVED = ("estimated", "kcal_source", "serving_g", "package_g", "kcal_package",
+               "proteins_package", "fat_package", "carbohydrates_package")
+    __slots__ = tuple(FIELDS) + DERIVED
+
+    def __init__(self, **values):
+        for field in self.__slots__:
+            setattr(self, field, values.get(field))
+
+    @classmethod
+    def from_nutriments(cls, nutriments: dict) -> "Nutrition":
+        nutrition = cls.__new__(cls)
+        for field in cls.DERIVED:
+            setattr(nutrition, field, None)
+        nutriments = nutriments or {}
+        for field, keys in cls.FIELDS.items():
+            value = first_number(nutriments, keys)
+            setattr(nutrition, field, None if value != value else value)
+        return nutrition
+
+    def __bool__(self):
+        return any(getattr(self, field) is not None for field in self.FIELDS)
+
+    @property
+    def kcal_estimated(self) -> bool:
+        """Калорийность посчитана (из кДж или по БЖУ), а не взята с этикетки"""
+        return "kcal_100g" in (self.estimated or ())
+
+    def to_nutriments(self) -> dict:
+        """Обратно в формат nutriments API (для JSON-кэшей, без расчётных значений)"""
+        nutriments = {}
+        estimated = self.estimated or ()
+        for field, keys in self.FIELDS.items():
+            value = getattr(self, field)
+            if value is not None and field not in estimated:
+                nutriments[keys[0]] = value
+        return nutriments
+
+
+class Product:
+    __slots__ = ("code", "product_name", "product_name_en", "brands", "quantity",
+                 "serving_size", "categories", "nutrition")
+
+    def __init__(self, code=None, product_name=None, product_name_en=None, brands=None,
+                 quantity=None, serving_size=None, categories=None, nutrition=None):
+        self.code = code
+        self.product_name = product_name
+        self.product_name_en = product_name_en
+        self.brands = brands
+        self.quantity = quantity
+        self.serving_size = serving_size
+        self.categories = categories
+        self.nutrition = nutrition if nutrition is not None else Nutrition()
+
+    @classmethod
+    def from_dict(cls, product: dict) -> "Product":
+        """Запись из словаря товара API (пустые строки и "None" - отсутствующие поля)"""
+        def text(field):
+            value = product.get(field)
+            if value is None or value == "" or value == "None":
+                return None
+            return str(value)
+        return cls(text("code"), text("product_name"), text("product_name_en"), text("brands"),
+                   text("quantity"), text("serving_size"), text("categories"),
+                   Nutrition.from_nutriments(product.get("nutriments")))
+
+    def to_dict(self) -> dict:
+        """Словарь в формате API"""
+        product = {field: getattr(self, field) for field in self.__slots__[:-1]
+                   if getattr(self, field) is not None}
+        product["nutriments"] = self.nutrition.to_nutriments()
+        return product
+
+    @property
+    def display_name(self) -> str:
+        """Название для показа (с запасным английским названием)"""
+        return self.product_name or self.product_name_en or "Продукт без названия"
+
+    @property
+    def main_category(self):
+        """Первая категория или None"""
+        if not self.categories:
+            return None
+        return self.categories.split(",")[0].strip() or None
+
+    def __repr__(self):
+        return f"Product({self.code!r}, {self.display_name!r})"
+
+
+def products_from_dicts(products) -> list:
+    """Записи Product для списка словарей API с нормализованной пищевой ценностью"""
+    from core import nutrients
+    records = [Product.from_dict(product) for product in products]
+    nutrients.fill_records(records)
+    return records
@@ -0,0 +1,78 @@
+"""
+Запросы товаров к Open Food Facts (бывшие функции main.py): ответ API как
+словарь, в офлайн-режиме - из локальной копии дампа. get_product_by_barcode -
+единственный путь запроса товара по штрихкоду для окон, lookup.Lookup и
+batch_lookup.py.
+"""
+from core import json_codec
+from core import off_client
+from core import offline_store
+from core import product_cache
+from core import singleflight
+
+
+def get_product_by_barcode(barcode: str, limiter=None) -> dict:
+    """
+    Получение конкретного продукта по штрихкоду (API v2, поля профиля detail).
+    Ответ берётся из офлайн-копии дампа, из кэша товаров или от API;
+    limiter (off_client.RateLimiter) ограничивает только сетевые запросы.
+    Ошибки сети и HTTP (кроме 404) - исключения requests.
+    """
+    store = offline_store.get_store()
+    if store is not None:
+        return store.lookup_barcode(barcode)
+    # Одновременные запросы одного штрихкода объединяются в один
+    flights = singleflight.get_single_flight()
+    return product_cache.get_cache().get_or_fetch(
+        barcode, lambda code: flights.do(("barcode", code), fetch_product, code, limiter))
+
+
+def fetch_product(barcode: str, limiter=None) -> dict:
+    """Запрос продукта по штрихкоду к Open Food Facts, без кэшей"""
+    if limiter is not None:
+        limiter.wait()
+    url = f"{off_client.BASE}/api/v2/product/{barcode}"
+    r = off_client.get(url, params={"fields": off_client.fields("detail")}, timeout=15, kind="barcode")
+    # API v2 отвечает 404 с телом {"status": 0}, если товара нет
+    if r.status_code != 404:
+        r.raise_for_status()
+    return json_codec.loads(r.content)
+
+
+def search_products(query: str, page_size=5, fields=None, lang="ru", country="ru") -> dict:
+    """
+    Поиск продуктов по тексту (Search API v2).
+    Пример фильтра: можно добавлять tags и условия по нутриентам.
+    """
+    if fields is None:
+        fields = off_client.fields("detail")
+    url = f"{off_client.BASE}/api/v2/search"
+    params = {
+        "search_terms": query,
+        "fields": fields,
+        "page_size": page_size,
+        "lc": lang,
+        "cc": country,
+    }
+    r = off_client.get(url, params=params, timeout=20, kind="search")
+    r.raise_for_status()
+    return json_codec.loads(r.content)
+
+
+def search_text(query: str, page_size=3, fields=None) -> dict:
+    """
+    Полнотекстовый поиск (cgi/search.pl) - одна страница без фильтра по
+    названию; постраничный поиск с фильтром - lookup.Lookup.
+    """
+    if fields is None:
+        fields = off_client.fields("detail")
+    url = f"{off_client.BASE}/cgi/search.pl"
+    params = {
+        "search_terms": query,
+        "page_size": page_size,
+        "json": 1,
+        "fields": fields,
+    }
+    r = off_client.get(url, params=params, timeout=10, kind="search")
+    r.raise_for_status()
+    return json_codec.loads(r.content)
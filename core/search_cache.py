@@ -0,0 +1,125 @@
+"""
+Кэш результатов поиска по названию (в памяти процесса, LRU).
+
+Ключ - нормализованный запрос: NFKC, регистр, пробелы и похожие буквы
+латиницы/кириллицы ("Milk", "milk " и "milk" - один запрос к API).
+
+Полный (complete) результат короткого запроса даёт предварительный ответ на
+его продолжения: get_prefix("milk 3") фильтрует сохранённый результат "milk".
+API ищет целые слова и на "milk 3" может найти другие товары, поэтому такой
+ответ только показывается до ответа API и в кэш не попадает.
+"""
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from core.name_matcher import NameMatcher
+
+# Буквы, которые выглядят одинаково в латинице и кириллице (после casefold)
+LATIN_TO_CYRILLIC = str.maketrans("aceopxyk", "асеорхук")
+CYRILLIC_TO_LATIN = str.maketrans("асеорхук", "aceopxyk")
+
+
+def _fold_word(word: str) -> str:
+    """Приводит похожие буквы к алфавиту, которого в слове больше"""
+    cyrillic = sum(1 for ch in word if "а" <= ch <= "я" or ch == "ё")
+    latin = sum(1 for ch in word if "a" <= ch <= "z")
+    if cyrillic and latin:
+        if cyrillic >= latin:
+            return word.translate(LATIN_TO_CYRILLIC)
+        return word.translate(CYRILLIC_TO_LATIN)
+    return word
+
+
+def normalize_query(query: str) -> str:
+    """
+    Нормализует поисковый запрос для ключа кэша и запроса к API.
+    """
+    query = unicodedata.normalize("NFKC", query).casefold()
+    return " ".join(_fold_word(word) for word in query.split())
+
+
+class SearchCache:
+    def __init__(self, max_entries=256, ttl=600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, query, count_miss=True):
+        """
+        Отфильтрованный список товаров для запроса или None. count_miss=False -
+        проверка перед поиском, который при промахе сам вызовет get.
+        """
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                if entry is not None:
+                    del self._data[key]
+                if count_miss:
+                    self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return list(entry[1])
+
+    def contains(self, query) -> bool:
+        """Есть ли свежий результат; без счётчиков и без изменения порядка LRU"""
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and time.monotonic() - entry[0] <= self.ttl
+
+    def get_prefix(self, query):
+        """
+        Предварительный результат для query: полный результат самого длинного
+        более короткого запроса, с которого query начинается, отфильтрованный
+        по query. Не сохраняется и не считается попаданием; None - такого нет.
+        """
+        key = normalize_query(query)
+        now = time.monotonic()
+        with self._lock:
+            for end in range(len(key) - 1, 0, -1):
+                entry = self._data.get(key[:end])
+                if entry is not None and entry[2] and now - entry[0] <= self.ttl:
+                    products = entry[1]
+                    break
+            else:
+                return None
+        return NameMatcher(key).filter(products)
+
+    def put(self, query, products, complete=False):
+        """
+        complete=True - в products все товары по запросу (API не обрезал
+        выдачу по числу страниц), такой результат годится для get_prefix.
+        """
+        key = normalize_query(query)
+        with self._lock:
+            self._data[key] = (time.monotonic(), list(products), complete)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_cache = SearchCache()
+
+
+def get_search_cache() -> SearchCache:
+    """Общий для приложения кэш поиска по названию"""
+    return _cache
@@ -0,0 +1,111 @@
+"""
+Объединение одинаковых одновременных запросов (single-flight).
+
+Если два потока одновременно просят один и тот же ключ (штрихкод,
+категорию, страницу поиска), к API уходит один запрос, а его результат
+(или исключение) получают оба. Результат общий - изменять его нельзя.
+
+do_async - то же для корутин (core.async_client): ключи общие с do, поэтому
+одинаковый запрос из потока и из цикла asyncio тоже уходит один раз.
+"""
+import asyncio
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        # Корутины, ждущие вызова: (цикл событий, future)
+        self.futures = []
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.calls = 0
+        self.collapsed = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        """fn(*args, **kwargs), но не больше одного одновременного вызова на ключ"""
+        call, leader = self._join(key)
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._finish(key, call)
+
+    async def do_async(self, key, fn, *args, **kwargs):
+        """
+        await fn(*args, **kwargs) для корутины fn, не больше одного
+        одновременного вызова на ключ (вместе с do). Ожидание чужого вызова
+        не блокирует цикл событий.
+        """
+        future = asyncio.get_running_loop().create_future()
+        call, leader = self._join(key, future)
+        if not leader:
+            await future
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = await fn(*args, **kwargs)
+            return call.result
+        except asyncio.CancelledError:
+            # Отмена касается только этой корутины, остальным - ошибка запроса
+            call.error = RuntimeError("запрос отменён")
+            raise
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._finish(key, call)
+
+    def _join(self, key, future=None):
+        """(вызов по ключу, True - вызывать fn самим); future - ожидание корутины"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+                return call, True
+            self.collapsed += 1
+            if future is not None:
+                call.futures.append((future.get_loop(), future))
+            return call, False
+
+    def _finish(self, key, call):
+        with self._lock:
+            del self._calls[key]
+        call.done.set()
+        for loop, future in call.futures:
+            loop.call_soon_threadsafe(_resolve, future)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"calls": self.calls, "collapsed": self.collapsed, "in_flight": len(self._calls)}
+
+
+_group = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    """Общая для приложения группа запросов к Open Food Facts"""
+    return _group
@@ -0,0 +1,160 @@
+"""
+Поиск товаров из командной строки, без Qt.
+
+Запросы - по одному в строке из файла или stdin, результаты - JSON lines в
+stdout: одна строка на запрос, в порядке входа.
+
+    echo 3017620422003 | python lookup_cli.py
+    python lookup_cli.py queries.txt --type name > found.jsonl
+    cut -f1 barcodes.tsv | python lookup_cli.py - --type similar --workers 16
+
+Тип запроса (--type): barcode, name, similar (похожие на товар со
+штрихкодом) или auto - штрихкод, если строка из цифр, иначе название.
+Строка может задать тип сама: "name<TAB>молоко".
+
+Сообщения о ходе поиска идут в stderr (--quiet - без них). Тысячи запросов
+в минуту - из кэшей и офлайн-базы (PZ5_BACKEND=offline); к Open Food Facts
+сетевые запросы идут не чаще --rate в секунду.
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from core import json_codec
+from core import off_client
+from core import offline_store
+from core.lookup import Lookup
+from core.nutrient_rules import KCAL_SOURCE_NAMES
+
+TYPES = ("barcode", "name", "similar")
+
+# Поля товара в выдаче (кроме пищевой ценности)
+PRODUCT_FIELDS = ("code", "product_name", "product_name_en", "brands", "quantity",
+                  "serving_size", "categories")
+
+
+def product_json(product) -> dict:
+    """Запись Product для выдачи: поля товара и nutrition с расчётными значениями"""
+    data = {field: getattr(product, field) for field in PRODUCT_FIELDS
+            if getattr(product, field) is not None}
+    nutrition = product.nutrition
+    data["nutrition"] = {field: getattr(nutrition, field) for field in nutrition.__slots__
+                         if getattr(nutrition, field) is not None}
+    if nutrition.kcal_source is not None:
+        data["nutrition"]["kcal_source"] = KCAL_SOURCE_NAMES[nutrition.kcal_source]
+    return data
+
+
+def parse_query(line: str, default="auto"):
+    """(тип, запрос) из строки входа; None - пустая строка"""
+    search_type, tab, query = line.partition("\t")
+    if tab and search_type in TYPES:
+        query = query.strip()
+    else:
+        search_type, query = default, line.strip()
+    if not query:
+        return None
+    if search_type == "auto":
+        search_type = "barcode" if query.isdigit() else "name"
+    return search_type, query
+
+
+def run_query(search_type: str, query: str, limiter=None) -> dict:
+    """Строка выдачи для одного запроса (ошибки - status "error")"""
+    record = {"query": query, "type": search_type}
+    lookup = Lookup(limiter=limiter)
+    try:
+        if search_type == "name":
+            result = lookup.search_products_by_name(query)
+            if "error" in result:
+                return dict(record, status="error", error=result["error"])
+            products = result["products"]
+            return dict(record, status="found" if products else "not_found", count=len(products),
+                        products=[product_json(product) for product in products])
+
+        result = lookup.lookup_barcode(query)
+        if "error" in result:
+            return dict(record, status="error", error=result["error"])
+        product = result.get("product")
+        if result.get("status") != 1 or not product:
+            return dict(record, status="not_found")
+        if search_type == "barcode":
+            return dict(record, status="found", product=product_json(product))
+        similar = lookup.find_similar_products(product)
+        return dict(record, status="found" if similar else "not_found", count=len(similar),
+                    products=[product_json(product) for product in similar])
+    except Exception as e:
+        return dict(record, status="error", error=str(e))
+
+
+def lookup_lines(lines, default="auto", workers=8, rate=1.5):
+    """
+    Генератор строк выдачи в порядке входа. В работе одновременно не больше
+    2 * workers запросов, вход читается лениво.
+    """
+    limiter = None if offline_store.get_store() is not None else off_client.RateLimiter(rate)
+    if workers > off_client.POOL_SIZE:
+        off_client.configure(pool_size=workers)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for line in lines:
+            parsed = parse_query(line, default)
+            if parsed is None:
+                continue
+            pending.append(executor.submit(run_query, *parsed, limiter))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Поиск товаров Open Food Facts с выдачей в JSON lines")
+    parser.add_argument("input", nargs="?", default="-", help="файл с запросами или - для stdin")
+    parser.add_argument("-o", "--output", default="-", help="файл JSON lines (по умолчанию stdout)")
+    parser.add_argument("--type", default="auto", choices=("auto",) + TYPES, help="тип запросов")
+    parser.add_argument("--workers", type=int, default=8, help="число параллельных запросов")
+    parser.add_argument("--rate", type=float, default=1.5,
+                        help="сетевых запросов в секунду (0 - без ограничения)")
+    parser.add_argument("--quiet", action="store_true", help="не выводить ход поиска в stderr")
+    args = parser.parse_args(argv)
+
+    src = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    # stdout - только для JSON lines: сообщения модулей поиска уходят в stderr
+    log = open(os.devnull, "w") if args.quiet else sys.stderr
+
+    counts = {"found": 0, "not_found": 0, "error": 0}
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(log):
+            for record in lookup_lines(src, args.type, args.workers, args.rate):
+                dst.write(json_codec.dumps(record) + "\n")
+                dst.flush()
+                counts[record["status"]] += 1
+    except BrokenPipeError:
+        # Читатель закрыл канал (например, | head): остальное не нужно, а
+        # stdout при выходе сбрасывается в /dev/null без ещё одной ошибки
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+        if log is not sys.stderr:
+            log.close()
+
+    if not args.quiet:
+        elapsed = time.perf_counter() - start
+        print(f"✅ Обработано: {sum(counts.values())} за {elapsed:.1f} с (найдено {counts['found']}, "
+              f"не найдено {counts['not_found']}, ошибок {counts['error']})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
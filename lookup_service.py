@@ -0,0 +1,274 @@
+"""
+Локальный HTTP-сервис поиска товаров для нескольких киосков в магазине.
+
+Один процесс держит кэш штрихкодов, кэш поиска и пул соединений к Open Food
+Facts для всех клиентов; одинаковые запросы разных киосков объединяются
+(singleflight). Сервер асинхронный (aiohttp, keep-alive), поиск - тот же
+lookup.Lookup, что у окон и lookup_cli.py, в пуле потоков.
+
+    python lookup_service.py --port 8765
+    PZ5_OFF_BASE=http://127.0.0.1:8765 python pz5_menu_final.py
+
+Эндпоинты (ответы - строки выдачи lookup_cli.py):
+    GET  /product/{barcode}        товар, 404 - не найден
+    GET  /search?q=молоко          поиск по названию; &type=similar, q - штрихкод:
+                                   похожие товары
+    POST /batch                    JSON-массив запросов: строки (как строки входа
+                                   lookup_cli.py) или {"type": ..., "query": ...}
+    GET  /stats                    кэши, объединённые запросы, трафик к API
+
+Окна и batch_lookup.py работают через сервис без изменений (PZ5_OFF_BASE):
+/api/v2/product/{barcode}, /cgi/search.pl и /api/v2/search отвечают как
+Open Food Facts, товары - из общего кэша, ответы поиска кэшируются на
+PROXY_TTL секунд.
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+from core import json_codec
+from core import off_client
+from core import offline_store
+from core import product_cache
+from core import search_cache
+from core import singleflight
+from core.lookup import Lookup
+from lookup_cli import TYPES, parse_query, run_query
+
+DEFAULT_PORT = 8765
+
+# Больше запросов в одном POST /batch - 413
+BATCH_LIMIT = 1000
+# Потоков для сетевых запросов POST /batch (отдельно от остальных эндпоинтов)
+BATCH_WORKERS = 4
+
+# Ответы поиска Open Food Facts, которые сервис отдаёт повторно без запроса
+PROXY_TTL = 60
+PROXY_MAX_ENTRIES = 512
+
+# Ответы короче не сжимаются
+COMPRESS_MIN_SIZE = 1024
+
+STATUS_CODES = {"found": 200, "not_found": 404, "error": 502}
+
+
+class ProxyCache:
+    """Тела ответов поиска Open Food Facts по (путь, параметры), LRU с TTL"""
+
+    def __init__(self, max_entries=PROXY_MAX_ENTRIES, ttl=PROXY_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                self._data.pop(key, None)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, body):
+        with self._lock:
+            self._data[key] = (time.monotonic(), body)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+class LookupService:
+    """
+    Обработчики сервиса. Запросы к API - синхронный lookup.Lookup в пуле из
+    workers потоков, запросы POST /batch - в своём пуле из batch_workers: пакет
+    не занимает потоки остальных эндпоинтов и держит в очереди ограничителя
+    частоты (limiter) не больше batch_workers запросов. Ответы из кэшей и
+    офлайн-базы - сразу в цикле событий, без очереди за сетевыми запросами.
+    """
+
+    def __init__(self, workers=16, rate=1.5, batch_workers=BATCH_WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="lookup")
+        self.batch_executor = ThreadPoolExecutor(max_workers=batch_workers, thread_name_prefix="batch")
+        self.limiter = None if offline_store.get_store() is not None else off_client.RateLimiter(rate)
+        self.proxy_cache = ProxyCache()
+        self.requests = defaultdict(int)
+        if workers + batch_workers > off_client.POOL_SIZE:
+            off_client.configure(pool_size=workers + batch_workers)
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.add_routes([
+            web.get("/product/{barcode}", self.product),
+            web.get("/search", self.search),
+            web.post("/batch", self.batch),
+            web.get("/stats", self.stats),
+            web.get("/api/v2/product/{barcode}", self.api_product),
+            web.get("/cgi/search.pl", self.api_search),
+            web.get("/api/v2/search", self.api_search),
+        ])
+        app.on_cleanup.append(self.on_cleanup)
+        return app
+
+    async def on_cleanup(self, app):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.batch_executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, fn, *args, executor=None):
+        """fn(*args) в пуле потоков сервиса (executor - другой пул)"""
+        return await asyncio.get_running_loop().run_in_executor(executor or self.executor, fn, *args)
+
+    def is_local(self, search_type, query) -> bool:
+        """
+        Ответ без сети: офлайн-база или запись в кэше товаров (поиска). Как у
+        ProductCache.get_or_fetch_async, короткие запросы к SQLite идут в цикле событий.
+        """
+        if search_type == "similar":
+            return False
+        if offline_store.get_store() is not None:
+            return True
+        if search_type == "barcode":
+            return product_cache.get_cache().servable(query)
+        return search_cache.get_search_cache().contains(query)
+
+    def respond(self, body: bytes, status=200) -> web.Response:
+        response = web.Response(body=body, status=status, content_type="application/json", charset="utf-8")
+        if len(body) >= COMPRESS_MIN_SIZE:
+            # gzip/deflate - если клиент прислал Accept-Encoding
+            response.enable_compression()
+        return response
+
+    def respond_json(self, data, status=200) -> web.Response:
+        return self.respond(json_codec.dumps(data).encode("utf-8"), status)
+
+    async def lookup(self, search_type, query, executor=None) -> dict:
+        self.requests[search_type] += 1
+        if self.is_local(search_type, query):
+            return run_query(search_type, query, self.limiter)
+        return await self.run(run_query, search_type, query, self.limiter, executor=executor)
+
+    async def product(self, request):
+        record = await self.lookup("barcode", request.match_info["barcode"])
+        return self.respond_json(record, STATUS_CODES[record["status"]])
+
+    async def search(self, request):
+        query = request.query.get("q", "").strip()
+        search_type = request.query.get("type", "name")
+        if not query or search_type not in ("name", "similar"):
+            return self.respond_json({"error": "нужен параметр q, type - name или similar"}, 400)
+        record = await self.lookup(search_type, query)
+        # Пустой результат поиска - не ошибка
+        return self.respond_json(record, 502 if record["status"] == "error" else 200)
+
+    async def batch(self, request):
+        try:
+            items = json_codec.loads(await request.read())
+        except ValueError:
+            return self.respond_json({"error": "тело запроса - не JSON"}, 400)
+        if not isinstance(items, list):
+            return self.respond_json({"error": "ожидался JSON-массив запросов"}, 400)
+        if len(items) > BATCH_LIMIT:
+            return self.respond_json({"error": f"не больше {BATCH_LIMIT} запросов"}, 413)
+
+        queries = []
+        for item in items:
+            if isinstance(item, dict) and item.get("type") in TYPES and str(item.get("query") or "").strip():
+                queries.append((item["type"], str(item["query"]).strip()))
+            elif isinstance(item, str) and parse_query(item) is not None:
+                queries.append(parse_query(item))
+            else:
+                return self.respond_json({"error": f"неверный запрос: {item!r}"}, 400)
+        self.requests["batch"] += 1
+        results = await asyncio.gather(*(self.lookup(*query, executor=self.batch_executor)
+                                         for query in queries))
+        return self.respond_json({"count": len(results), "results": results})
+
+    async def stats(self, request):
+        cache = product_cache.get_cache().stats() if offline_store.get_store() is None else None
+        names = search_cache.get_search_cache()
+        return self.respond_json({
+            "requests": dict(self.requests),
+            "product_cache": cache,
+            "search_cache": {"hits": names.hits, "misses": names.misses},
+            "proxy_cache": self.proxy_cache.stats(),
+            "single_flight": singleflight.get_single_flight().stats(),
+            "traffic": off_client.traffic_stats(),
+        })
+
+    async def api_product(self, request):
+        """Как /api/v2/product/{barcode} Open Food Facts, из общего кэша (поля профиля detail)"""
+        self.requests["api_product"] += 1
+        lookup = Lookup(limiter=self.limiter)
+        barcode = request.match_info["barcode"]
+        if self.is_local("barcode", barcode):
+            data = lookup.get_product_by_barcode(barcode)
+        else:
+            data = await self.run(lookup.get_product_by_barcode, barcode)
+        if "error" in data:
+            return self.respond_json(data, 502)
+        return self.respond_json(data, 200 if data.get("status") == 1 else 404)
+
+    async def api_search(self, request):
+        """Поиск Open Food Facts с теми же параметрами: общий пул, кэш ответов, объединение запросов"""
+        self.requests["api_search"] += 1
+        key = (request.path, tuple(sorted(request.query.items())))
+        body = self.proxy_cache.get(key)
+        if body is None:
+            status, body = await self.run(
+                singleflight.get_single_flight().do, ("proxy",) + key, self.fetch_upstream, *key)
+            if status != 200:
+                return self.respond(body, status)
+            self.proxy_cache.put(key, body)
+        return self.respond(body)
+
+    def fetch_upstream(self, path, params):
+        """(статус, тело) ответа Open Food Facts; сетевая ошибка - 502"""
+        if self.limiter is not None:
+            self.limiter.wait()
+        try:
+            response = off_client.get(off_client.BASE + path, params=list(params), timeout=15, kind="search")
+        except OSError as e:
+            return 502, json_codec.dumps({"error": f"Ошибка запроса: {e}"}).encode("utf-8")
+        return response.status_code, response.content
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Локальный сервис поиска товаров Open Food Facts")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--upstream", default=off_client.DEFAULT_BASE,
+                        help="адрес Open Food Facts (или заглушки для проверки)")
+    parser.add_argument("--workers", type=int, default=16, help="потоков для запросов к API")
+    parser.add_argument("--batch-workers", type=int, default=BATCH_WORKERS,
+                        help="потоков для запросов POST /batch к API")
+    parser.add_argument("--rate", type=float, default=1.5,
+                        help="запросов к API в секунду (0 - без ограничения)")
+    parser.add_argument("--quiet", action="store_true", help="не выводить ход поиска")
+    args = parser.parse_args(argv)
+
+    off_client.BASE = args.upstream.rstrip("/")
+    service = LookupService(args.workers, args.rate, args.batch_workers)
+    print(f"🌐 Сервис: http://{args.host}:{args.port} -> {off_client.BASE}", flush=True)
+    log = open(os.devnull, "w") if args.quiet else sys.stdout
+    with contextlib.redirect_stdout(log):
+        web.run_app(service.make_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QTextEdit, QTabWidget, QFrame, QMessageBox, QGroupBox)
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QPixmap, QFont
-from main import get_product_by_barcode, search_products, extract_kcal
+import core
 
 # Стилизация приложения в соответствии с главой 6
 style_sheet = """
@@ -282,7 +282,7 @@ class NutritionApp(QMainWindow):
         self.display_search_status("Поиск по штрихкоду...")
         
         try:
-            result = get_product_by_barcode(barcode)
+            result = core.get_product_by_barcode(barcode)
             
             if result.get("product"):
                 product = result["product"]
@@ -303,7 +303,7 @@ class NutritionApp(QMainWindow):
         self.display_search_status("Поиск по названию...")
         
         try:
-            result = search_products(query, page_size=5)
+            result = core.search_products(query, page_size=5)
             products = result.get("products", [])
             
             if not products:
@@ -343,7 +343,7 @@ class NutritionApp(QMainWindow):
         self.results_display.append(f"🍽️ Порция: {product.get('serving_size', 'Не указана')}")
         
         # Нутриенты
-        nutriments = extract_kcal(product.get("nutriments", {}))
+        nutriments = core.extract_kcal(product.get("nutriments", {}), product.get("serving_size"))
         if nutriments:
             self.results_display.append("\n📊 Пищевая ценность:")
             for key, value in nutriments.items():
@@ -1,5 +1,6 @@
 import sys
-import requests
+# Запросы - в ядре без Qt (core), оно загружается при первом поиске
+import core
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QLabel, QLineEdit, QPushButton, 
                              QTextEdit, QTabWidget, QFrame, QMessageBox, QGroupBox)
@@ -309,23 +310,13 @@ class NutritionApp(QMainWindow):
             self.results_display.append("🔧 Проверьте подключение к интернету")
     
     def get_product_by_barcode(self, barcode):
-        """Получение продукта по штрихкоду через Open Food Facts API"""
+        """Получение продукта по штрихкоду через Open Food Facts API (core)"""
         try:
-            url = f"https://world.openfoodfacts.org/api/v0/product/{barcode}.json"
-            self.results_display.append(f"🌐 Запрос к: {url}")
-            
-            response = requests.get(url, timeout=10)
-            self.results_display.append(f"📊 Статус ответа: {response.status_code}")
-            
-            if response.status_code == 200:
-                data = response.json()
-                self.results_display.append(f"📦 Статус продукта: {data.get('status_verbose', 'N/A')}")
-                return data
-            else:
-                self.results_display.append(f"❌ HTTP ошибка: {response.status_code}")
-                return None
-                
-        except requests.exceptions.RequestException as e:
+            data = core.get_product_by_barcode(barcode)
+            self.results_display.append(f"📦 Статус продукта: {data.get('status_verbose', 'N/A')}")
+            return data
+        except OSError as e:
+            # Ошибки requests (сеть, HTTP) - подклассы OSError
             self.results_display.append(f"❌ Ошибка сети: {e}")
             return None
         except Exception as e:
@@ -333,29 +324,13 @@ class NutritionApp(QMainWindow):
             return None
     
     def search_products(self, query, page_size=3):
-        """Поиск продуктов по названию через Open Food Facts API"""
+        """Поиск продуктов по названию через Open Food Facts API (core)"""
         try:
-            url = f"https://world.openfoodfacts.org/cgi/search.pl"
-            params = {
-                'search_terms': query,
-                'page_size': page_size,
-                'json': 1
-            }
-            
             self.results_display.append(f"🌐 Поисковый запрос...")
-            
-            response = requests.get(url, params=params, timeout=10)
-            self.results_display.append(f"📊 Статус ответа: {response.status_code}")
-            
-            if response.status_code == 200:
-                data = response.json()
-                self.results_display.append(f"📦 Найдено продуктов: {data.get('count', 0)}")
-                return data
-            else:
-                self.results_display.append(f"❌ HTTP ошибка: {response.status_code}")
-                return None
-                
-        except requests.exceptions.RequestException as e:
+            data = core.search_text(query, page_size=page_size)
+            self.results_display.append(f"📦 Найдено продуктов: {data.get('count', 0)}")
+            return data
+        except OSError as e:
             self.results_display.append(f"❌ Ошибка сети: {e}")
             return None
         except Exception as e:
@@ -1,11 +1,24 @@
+import os
 import sys
-import requests
+import threading
+import time
+# Поиск - в ядре без Qt (core); numpy подгружается при первых результатах
+import core
+from core import off_client
+from core import offline_store
+from core import product_cache
+from core import search_cache
+from core import singleflight
+from core.nutrient_rules import KCAL_FROM_KJ, KCAL_FROM_MACROS
+from core.cancellation import CancelToken
+from qt_async import AsyncRunner
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QLabel, QLineEdit, QPushButton, 
                              QTextEdit, QTabWidget, QFrame, QMessageBox, QGroupBox,
-                             QScrollArea, QProgressBar)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
-from PyQt6.QtGui import QFont
+                             QProgressBar, QCheckBox, QListView, QAbstractItemView, QStyledItemDelegate, QStyle)
+from PyQt6.QtCore import Qt, QObject, QThreadPool, QTimer, pyqtSignal, QAbstractListModel, QModelIndex, QSize, QRectF, QPoint
+from PyQt6 import sip
+from PyQt6.QtGui import QFont, QFontMetrics, QPainter, QColor, QPen
 
 # Стилизация приложения
 style_sheet = """
@@ -115,19 +128,11 @@ QGroupBox::title {
     padding: 0 5px;
 }
 
-QScrollArea {
+QListView {
     border: none;
     background-color: transparent;
 }
 
-QWidget#SimilarProduct {
-    background-color: #FFFFFF;
-    border: 1px solid #DDDDDD;
-    border-radius: 5px;
-    padding: 8px;
-    margin: 3px;
-}
-
 QProgressBar {
     border: 2px solid #CCCCCC;
     border-radius: 5px;
@@ -141,143 +146,374 @@ QProgressBar::chunk {
 }
 """
 
-class SearchThread(QThread):
-    finished = pyqtSignal(dict)
-    error = pyqtSignal(str)
+# Поиск при вводе: пауза после нажатия клавиши и минимальная длина запроса
+TYPING_DEBOUNCE_MS = 300
+MIN_INCREMENTAL_LENGTH = 2
+
+# Число потоков пула запросов (переменная окружения PZ5_WORKERS)
+LOOKUP_WORKERS = int(os.environ.get("PZ5_WORKERS", 4))
+
+# Сколько окно при закрытии ждёт запросы пула, мс (дольше не ждём сеть)
+CLOSE_WAIT_MS = 2000
+
+# Нутриенты в карточке товара: атрибут Nutrition -> (подпись, цвет)
+NUTRIENTS_TO_SHOW = {
+    'kcal_100g': ('🔥 Калории', '#E91E63'),
+    'proteins_100g': ('🥚 Белки', '#4CAF50'),
+    'carbohydrates_100g': ('🍞 Углеводы', '#FF9800'),
+    'sugars_100g': ('🍭 Сахар', '#9C27B0'),
+    'fat_100g': ('🥑 Жиры', '#795548'),
+    'fiber_100g': ('🌾 Клетчатка', '#8BC34A'),
+    'salt_100g': ('🧂 Соль', '#607D8B')
+}
+
+# Пометка к калорийности, которой нет на этикетке (Nutrition.kcal_source)
+KCAL_SOURCE_NOTES = {
+    KCAL_FROM_KJ: " (из кДж)",
+    KCAL_FROM_MACROS: " (по БЖУ)",
+}
+
+# Предзагрузка полных карточек товаров правой панели: не больше PREFETCH_BUDGET
+# запросов на один список и PREFETCH_CONCURRENCY одновременно
+PREFETCH_BUDGET = 24
+PREFETCH_CONCURRENCY = 2
+
+class SearchSignals(QObject):
+    # Все сигналы несут номер поиска (seq): окно отбрасывает ответы устаревших поисков
+    result_ready = pyqtSignal(int, dict)
+    error = pyqtSignal(int, str)
+    products_batch = pyqtSignal(int, list)
+    similar_ready = pyqtSignal(int, list)
+
+class SearchTask(core.Lookup):
+    """
+    Один запрос (штрихкод, название или похожие товары) для пула LookupPool.
+    search_type: "barcode", "name" или "similar" (тогда query - Product).
+    Сам поиск - core.Lookup, результаты уходят в окно сигналами.
+    """
     
-    def __init__(self, search_type, query):
-        super().__init__()
+    def __init__(self, search_type, query, seq=0, token=None):
+        super().__init__(token)
+        self.signals = SearchSignals()
         self.search_type = search_type
         self.query = query
+        self.seq = seq
     
     def run(self):
         try:
+            if self.token.cancelled:
+                return
+            if self.search_type == "similar":
+                similar_products = self.find_similar_products(self.query)
+                if not self.token.cancelled:
+                    self.signals.similar_ready.emit(self.seq, similar_products)
+                return
             if self.search_type == "barcode":
-                result = self.get_product_by_barcode(self.query)
+                result = self.lookup_barcode(self.query)
             else:
                 result = self.search_products_by_name(self.query)
-            self.finished.emit(result)
+            if not self.token.cancelled:
+                self.signals.result_ready.emit(self.seq, result)
         except Exception as e:
-            self.error.emit(str(e))
+            if not self.token.cancelled:
+                self.signals.error.emit(self.seq, str(e))
     
-    def get_product_by_barcode(self, barcode):
-        """Получение продукта по штрихкоду"""
-        try:
-            print(f"🔍 Запрос штрихкода: {barcode}")
-            url = f"https://world.openfoodfacts.org/api/v0/product/{barcode}.json"
-            response = requests.get(url, timeout=15)
-            print(f"📊 Статус ответа: {response.status_code}")
-            
-            if response.status_code == 200:
-                data = response.json()
-                print(f"📦 Статус продукта: {data.get('status_verbose', 'N/A')}")
-                return data
-            else:
-                return {"error": f"HTTP ошибка: {response.status_code}"}
-        except Exception as e:
-            return {"error": f"Ошибка запроса: {str(e)}"}
+    def emit_batch(self, products):
+        if products and not self.token.cancelled:
+            self.signals.products_batch.emit(self.seq, products)
+
+class LookupPool:
+    """
+    Постоянный пул потоков для всех запросов окна (QThreadPool).
+    Считает очередь, занятые потоки и загрузку пула.
+    """
+    
+    def __init__(self, workers=LOOKUP_WORKERS, parent=None):
+        self.pool = QThreadPool(parent)
+        self.pool.setMaxThreadCount(workers)
+        # Потоки не должны стоять в очереди за свободным соединением
+        if workers > off_client.POOL_SIZE:
+            off_client.configure(pool_size=workers)
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.busy_time = 0.0
+        self.started_at = time.monotonic()
+    
+    @property
+    def workers(self):
+        return self.pool.maxThreadCount()
     
-    def search_products_by_name(self, query):
-        """Поиск продуктов ТОЛЬКО по названию"""
+    def start(self, task, priority=0):
+        """Ставит задачу (объект с методом run) в очередь пула"""
+        with self._lock:
+            self.queued += 1
+        self.pool.start(lambda: self._run(task), priority)
+    
+    def _run(self, task):
+        # Поток пула
+        with self._lock:
+            self.queued -= 1
+            self.active += 1
+        start = time.monotonic()
         try:
-            print(f"🔍 Поиск товара: '{query}'")
-            url = "https://world.openfoodfacts.org/cgi/search.pl"
-            params = {
-                'search_terms': query,
-                'page_size': 15,
-                'json': 1,
-                'search_simple': 1,
-                'sort_by': 'unique_scans_n',
-                'fields': 'code,product_name,brands,categories,quantity,serving_size,nutriments,product_name_en'
+            task.run()
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+                self.busy_time += time.monotonic() - start
+    
+    def stats(self) -> dict:
+        with self._lock:
+            elapsed = time.monotonic() - self.started_at
+            return {
+                "workers": self.workers,
+                "queued": self.queued,
+                "active": self.active,
+                "completed": self.completed,
+                # Доля времени, которую потоки пула были заняты с момента запуска
+                "utilisation": self.busy_time / (elapsed * self.workers) if elapsed else 0.0,
             }
-            
-            response = requests.get(url, params=params, timeout=15)
-            print(f"📊 Статус ответа: {response.status_code}")
-            
-            if response.status_code == 200:
-                data = response.json()
-                products = data.get("products", [])
-                
-                # Фильтруем товары: оставляем только те, где название содержит искомое слово
-                filtered_products = []
-                query_lower = query.lower()
-                
-                for product in products:
-                    product_name = product.get('product_name', '').lower()
-                    product_name_en = product.get('product_name_en', '').lower()
-                    
-                    # Проверяем, содержит ли название искомое слово
-                    if (query_lower in product_name or 
-                        query_lower in product_name_en or
-                        any(query_lower in word for word in product_name.split()) or
-                        any(query_lower in word for word in product_name_en.split())):
-                        filtered_products.append(product)
-                
-                print(f"📦 Найдено товаров: {len(products)}")
-                print(f"🎯 Отфильтровано по названию: {len(filtered_products)}")
-                
-                data["products"] = filtered_products
-                return data
-            else:
-                return {"error": f"HTTP ошибка: {response.status_code}"}
-        except Exception as e:
-            return {"error": f"Ошибка запроса: {str(e)}"}
+    
+    def wait(self, msecs=-1):
+        return self.pool.waitForDone(msecs)
+    
+    def shutdown(self, msecs):
+        """
+        Снимает задачи из очереди и ждёт начатые не дольше msecs. Не дождались -
+        пул отвязывается от окна и не удаляется: деструктор QThreadPool ждал бы
+        запрос до таймаута HTTP и держал бы выход из программы. Потоки с
+        отменёнными задачами ничего не отправят в окно и завершатся вместе с
+        процессом. True - все задачи завершились.
+        """
+        self.pool.clear()
+        if self.pool.waitForDone(msecs):
+            return True
+        self.pool.setParent(None)
+        sip.transferto(self.pool, None)
+        return False
+
+class DetailsPrefetcher(QObject):
+    """
+    Прогревает кэш товаров полными карточками товаров правой панели, чтобы
+    «Подробнее» открывалось без ожидания. Очередь - по приоритету (видимые
+    строки первыми), на один список не больше budget запросов.
 
-class SimilarProductWidget(QWidget):
-    def __init__(self, product, parent=None):
+    Запросы - корутины AsyncOFFClient в цикле asyncio (qt_async.AsyncRunner):
+    потоки пула остаются поискам пользователя, а reset() обрывает загрузки
+    старого списка сразу, не дожидаясь ответа.
+    """
+    # Полная карточка загружена: штрихкод, ответ API (товар - запись Product)
+    product_ready = pyqtSignal(str, dict)
+    
+    def __init__(self, runner, budget=PREFETCH_BUDGET, concurrency=PREFETCH_CONCURRENCY, parent=None):
         super().__init__(parent)
-        self.product = product
-        self.parent = parent
-        self.initUI()
+        self.runner = runner
+        self.budget = budget
+        self.concurrency = concurrency
+        self.tasks = set()
+        self.queue = []
+        self.seen = set()
+        self.started = 0
     
-    def initUI(self):
-        self.setObjectName("SimilarProduct")
-        layout = QVBoxLayout(self)
-        
-        # Название продукта
-        product_name = self.product.get('product_name', 'Неизвестный продукт')
-        if not product_name or product_name == 'None':
-            product_name = self.product.get('product_name_en', 'Продукт без названия')
-        
-        if len(product_name) > 35:
-            product_name = product_name[:35] + "..."
-        
-        name_label = QLabel(product_name)
-        name_label.setObjectName("ProductHeader")
-        name_label.setWordWrap(True)
-        layout.addWidget(name_label)
-        
-        # Бренд
-        brand = self.product.get('brands', '')
-        if brand and brand != 'None':
-            brand_label = QLabel(f"🏷️ {brand}")
-            brand_label.setStyleSheet("color: #666; font-size: 11px;")
-            layout.addWidget(brand_label)
-        
-        # Калории
-        nutriments = self.product.get('nutriments', {})
-        calories = nutriments.get('energy-kcal_100g')
-        if calories:
-            calories_label = QLabel(f"🔥 {calories} ккал/100г")
-            calories_label.setStyleSheet("color: #E91E63; font-weight: bold; font-size: 11px;")
-            layout.addWidget(calories_label)
-        
-        # Кнопка для просмотра деталей
-        details_btn = QPushButton("Подробнее")
-        details_btn.setObjectName("Similar")
-        details_btn.clicked.connect(self.show_details)
-        layout.addWidget(details_btn)
+    def reset(self):
+        """Новый список товаров: загрузки отменяются, очередь и бюджет заново"""
+        for task in self.tasks:
+            task.cancel()
+        self.tasks = set()
+        self.queue = []
+        self.seen = set()
+        self.started = 0
+    
+    def schedule(self, codes):
+        """Добавляет штрихкоды в начало очереди (в переданном порядке)"""
+        if offline_store.get_store() is not None:
+            return  # Офлайн-база отвечает сразу, прогревать нечего
+        cache = product_cache.get_cache()
+        fresh = []
+        for code in codes:
+            if not code or code in self.seen:
+                continue
+            self.seen.add(code)
+            # Проверка без UPDATE used_at: видимость строки - не использование
+            if not cache.contains(code):
+                fresh.append(code)
+        self.queue[:0] = fresh
+        self.pump()
+    
+    def request(self, code):
+        """Карточка нужна сейчас: запрос вне очереди и сверх бюджета"""
+        if code in self.queue:
+            self.queue.remove(code)
+        self.seen.add(code)
+        self.start(code)
     
-    def show_details(self):
-        """Показать детали этого продукта в основном окне"""
-        if self.parent:
-            self.parent.display_single_product(self.product, "ВЫБРАННЫЙ ТОВАР")
+    def pump(self):
+        while self.queue and len(self.tasks) < self.concurrency and self.started < self.budget:
+            self.start(self.queue.pop(0))
+    
+    def start(self, code):
+        self.started += 1
+        task = self.runner.submit(
+            self.runner.client.get_product_by_barcode(code),
+            on_result=lambda result: self.on_task_done(task, code, result),
+            on_error=lambda error: self.on_task_error(task, code, error))
+        self.tasks.add(task)
+    
+    def on_task_done(self, task, code, result):
+        # Колбэки отменённых задач не вызываются - ответ относится к текущему списку
+        self.tasks.discard(task)
+        if result.get("status") == 1 and result.get("product"):
+            product = core.products_from_dicts([result["product"]])[0]
+            self.product_ready.emit(code, dict(result, product=product))
+        self.pump()
+    
+    def on_task_error(self, task, code, error):
+        self.tasks.discard(task)
+        print(f"⚠️ Предзагрузка {code}: {error}")
+        self.pump()
+
+# Роль модели, по которой отдаётся запись товара
+PRODUCT_ROLE = Qt.ItemDataRole.UserRole
+
+class ProductListModel(QAbstractListModel):
+    """Модель списка найденных товаров: хранит только записи Product"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.products = []
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.products)
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        product = self.products[index.row()]
+        if role == PRODUCT_ROLE:
+            return product
+        if role == Qt.ItemDataRole.DisplayRole:
+            return product.display_name
+        return None
+    
+    def set_products(self, products):
+        self.beginResetModel()
+        self.products = list(products)
+        self.endResetModel()
+    
+    def append_products(self, products):
+        if not products:
+            return
+        first = len(self.products)
+        self.beginInsertRows(QModelIndex(), first, first + len(products) - 1)
+        self.products.extend(products)
+        self.endInsertRows()
+    
+    def clear(self):
+        self.set_products([])
+
+class ProductDelegate(QStyledItemDelegate):
+    """
+    Рисует карточку товара (название, бренд, калории, «Подробнее») прямо в
+    QListView: виджеты не создаются, рисуются только видимые строки.
+    """
+    ROW_HEIGHT = 84
+    BUTTON_WIDTH = 90
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.header_font = QFont("Arial", 9, QFont.Weight.Bold)
+        self.info_font = QFont("Arial", 8)
+        self.calories_font = QFont("Arial", 8, QFont.Weight.Bold)
+    
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ROW_HEIGHT)
+    
+    def paint(self, painter, option, index):
+        product = index.data(PRODUCT_ROLE)
+        hovered = bool(option.state & QStyle.StateFlag.State_MouseOver)
+        
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        
+        # Карточка
+        card = QRectF(option.rect.adjusted(3, 3, -3, -3))
+        painter.setPen(QPen(QColor("#DDDDDD")))
+        painter.setBrush(QColor("#F5FAFF" if hovered else "#FFFFFF"))
+        painter.drawRoundedRect(card, 5, 5)
+        
+        # Название
+        header = card.adjusted(8, 6, -8, 0)
+        header.setHeight(26)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor("#2196F3"))
+        painter.drawRoundedRect(header, 5, 5)
+        painter.setFont(self.header_font)
+        painter.setPen(QColor("#FFFFFF"))
+        text_rect = header.adjusted(6, 0, -6, 0)
+        name = QFontMetrics(self.header_font).elidedText(
+            product.display_name, Qt.TextElideMode.ElideRight, int(text_rect.width()))
+        painter.drawText(text_rect, Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft, name)
+        
+        # Кнопка «Подробнее» (клик по любой части карточки)
+        button = QRectF(card.right() - 8 - self.BUTTON_WIDTH, header.bottom() + 8, self.BUTTON_WIDTH, 28)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor("#F57C00" if hovered else "#FF9800"))
+        painter.drawRoundedRect(button, 5, 5)
+        painter.setFont(self.header_font)
+        painter.setPen(QColor("#FFFFFF"))
+        painter.drawText(button, Qt.AlignmentFlag.AlignCenter, "Подробнее")
+        
+        # Бренд и калории
+        info = QRectF(header.left() + 2, header.bottom() + 4, button.left() - header.left() - 10, 16)
+        brand = product.brands
+        if brand:
+            painter.setFont(self.info_font)
+            painter.setPen(QColor("#666666"))
+            brand = QFontMetrics(self.info_font).elidedText(
+                f"🏷️ {brand}", Qt.TextElideMode.ElideRight, int(info.width()))
+            painter.drawText(info, Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft, brand)
+        
+        calories = product.nutrition.kcal_100g
+        if calories:
+            painter.setFont(self.calories_font)
+            painter.setPen(QColor("#E91E63"))
+            # ≈ - калорийность посчитана, на этикетке её нет
+            approx = "≈" if product.nutrition.kcal_estimated else ""
+            painter.drawText(info.translated(0, 18), Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft,
+                             f"🔥 {approx}{calories:.0f} ккал/100г")
+        
+        painter.restore()
 
 class NutritionApp(QMainWindow):
     def __init__(self):
         super().__init__()
         self.current_search_results = []
-        self.search_thread = None
+        # Номер текущего поиска и токен отмены его запросов
+        self.search_seq = 0
+        self.search_token = None
+        # Нормализованный запрос текущего поиска по названию
+        self.search_query = None
+        self.similar_pending = False
+        
+        # Поиск при вводе: запрос уходит после паузы в наборе
+        self.typing_timer = QTimer(self)
+        self.typing_timer.setSingleShot(True)
+        self.typing_timer.setInterval(TYPING_DEBOUNCE_MS)
+        self.typing_timer.timeout.connect(self.incremental_search)
+        # Все запросы окна идут через постоянный пул потоков
+        self.lookup_pool = LookupPool(parent=self)
+        # Полные карточки товаров правой панели загружаются заранее, корутинами
+        self.async_runner = AsyncRunner(parent=self)
+        self.prefetcher = DetailsPrefetcher(self.async_runner, parent=self)
+        self.prefetcher.product_ready.connect(self.on_details_ready)
+        self.details_code = None
+        self.prefetch_timer = QTimer(self)
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.setInterval(100)
+        self.prefetch_timer.timeout.connect(self.prefetch_visible_products)
         self.initUI()
         
     def initUI(self):
@@ -334,6 +570,18 @@ class NutritionApp(QMainWindow):
         self.stats_label.setWordWrap(True)
         left_layout.addWidget(self.stats_label)
         
+        # Состояние пула потоков
+        self.pool_label = QLabel()
+        self.pool_label.setStyleSheet("color: #999; font-size: 9px; padding: 2px 5px;")
+        self.pool_label.setWordWrap(True)
+        left_layout.addWidget(self.pool_label)
+        
+        self.pool_timer = QTimer(self)
+        self.pool_timer.setInterval(1000)
+        self.pool_timer.timeout.connect(self.update_pool_label)
+        self.pool_timer.start()
+        self.update_pool_label()
+        
         left_layout.addStretch()
         
         # Центральная панель - основной результат (35%)
@@ -367,19 +615,34 @@ class NutritionApp(QMainWindow):
         
         right_layout.addWidget(similar_label)
         
-        # Scroll area для товаров
-        self.products_scroll = QScrollArea()
-        self.products_scroll.setWidgetResizable(True)
-        self.products_scroll.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
-        self.products_scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-        
-        # Контейнер для товаров
-        self.products_container = QWidget()
-        self.products_layout = QVBoxLayout(self.products_container)
-        self.products_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
-        
-        self.products_scroll.setWidget(self.products_container)
-        right_layout.addWidget(self.products_scroll)
+        # Заголовок списка и сообщения панели
+        self.products_title = "НАЙДЕННЫЕ ТОВАРЫ"
+        self.products_title_label = QLabel()
+        self.products_title_label.setStyleSheet("font-weight: bold; color: #2196F3; font-size: 12px; margin: 5px;")
+        self.products_title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.products_title_label.setVisible(False)
+        right_layout.addWidget(self.products_title_label)
+        
+        self.products_message_label = QLabel()
+        self.products_message_label.setStyleSheet("color: #666; font-style: italic; margin: 10px;")
+        self.products_message_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.products_message_label.setWordWrap(True)
+        self.products_message_label.setVisible(False)
+        right_layout.addWidget(self.products_message_label)
+        
+        # Список товаров: модель + делегат, рисуются только видимые строки
+        self.products_model = ProductListModel(self)
+        self.products_view = QListView()
+        self.products_view.setModel(self.products_model)
+        self.products_view.setItemDelegate(ProductDelegate(self.products_view))
+        self.products_view.setUniformItemSizes(True)
+        self.products_view.setMouseTracking(True)
+        self.products_view.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.products_view.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.products_view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.products_view.clicked.connect(self.show_product_details)
+        self.products_view.verticalScrollBar().valueChanged.connect(self.prefetch_timer.start)
+        right_layout.addWidget(self.products_view)
         
         # Добавляем все панели в основной layout
         main_layout.addWidget(left_widget)      # 25% - поиск
@@ -406,6 +669,7 @@ class NutritionApp(QMainWindow):
         self.search_input.setPlaceholderText("Введите название товара...")
         self.search_input.setFont(QFont("Arial", 10))
         self.search_input.returnPressed.connect(lambda: self.search_by_name())
+        self.search_input.textEdited.connect(self.on_search_text_edited)
         
         search_frame_layout.addWidget(search_label)
         search_frame_layout.addWidget(self.search_input)
@@ -417,6 +681,13 @@ class NutritionApp(QMainWindow):
         self.search_btn.clicked.connect(lambda: self.search_by_name())
         search_layout.addWidget(self.search_btn)
         
+        # Поиск при вводе. Выключен по умолчанию: поиск Open Food Facts
+        # допускает около 10 запросов в минуту, а набор названия - это несколько
+        self.incremental_checkbox = QCheckBox("Искать при вводе")
+        self.incremental_checkbox.setFont(QFont("Arial", 9))
+        self.incremental_checkbox.setChecked(False)
+        search_layout.addWidget(self.incremental_checkbox)
+        
         layout.addWidget(search_group)
         
         # Примеры названий
@@ -476,6 +747,7 @@ class NutritionApp(QMainWindow):
     
     def search_by_name(self):
         """Поиск товаров по названию"""
+        self.typing_timer.stop()
         query = self.search_input.text().strip()
         if not query:
             QMessageBox.warning(self, "Ошибка", "Введите название товара")
@@ -483,6 +755,45 @@ class NutritionApp(QMainWindow):
         
         self.start_search("name", query)
     
+    def on_search_text_edited(self, text):
+        """Каждое нажатие перезапускает таймер: поиск начнётся после паузы"""
+        if self.incremental_checkbox.isChecked():
+            self.typing_timer.start()
+    
+    def incremental_search(self):
+        """
+        Поиск при вводе: из кэша или один запрос к API. Пока запрос идёт,
+        показываются товары из кэша по началу запроса (только предварительно).
+        """
+        query = self.search_input.text().strip()
+        if len(query) < MIN_INCREMENTAL_LENGTH:
+            return
+        if search_cache.normalize_query(query) == self.search_query:
+            return  # Этот запрос уже выполняется или показан
+        
+        cache = search_cache.get_search_cache()
+        # Промах посчитает сам поиск (Lookup.search_products_by_name)
+        products = cache.get(query, count_miss=False)
+        if products is not None:
+            self.show_cached_search(query, products)
+            return
+        self.start_search("name", query)
+        provisional = cache.get_prefix(query)
+        if provisional:
+            # Первая страница ответа API заменит этот список
+            self.show_all_products(provisional, "ПРЕДВАРИТЕЛЬНО, ИЗ КЭША")
+    
+    def show_cached_search(self, query, products):
+        """Показывает результат поиска по названию без фонового потока"""
+        self.cancel_search()
+        self.search_seq += 1
+        self.search_query = search_cache.normalize_query(query)
+        
+        self.display_search_status(f"⚡ Из кэша: '{query}'")
+        self.clear_products()
+        self.current_search_results = []
+        self.on_search_finished(self.search_seq, {"products": products, "count": len(products)})
+    
     def search_by_barcode(self):
         """Поиск товара по штрихкоду"""
         barcode = self.barcode_input.text().strip()
@@ -494,8 +805,7 @@ class NutritionApp(QMainWindow):
     
     def start_search(self, search_type, query):
         """Запуск поиска в отдельном потоке"""
-        if self.search_thread and self.search_thread.isRunning():
-            self.search_thread.terminate()
+        self.cancel_search()
         
         self.progress_bar.setVisible(True)
         self.progress_bar.setRange(0, 0)
@@ -508,14 +818,34 @@ class NutritionApp(QMainWindow):
             self.stats_label.setText(f"🔍 Поиск по штрихкоду: {query}")
         
         self.clear_products()
+        self.current_search_results = []
         
-        self.search_thread = SearchThread(search_type, query)
-        self.search_thread.finished.connect(self.on_search_finished)
-        self.search_thread.error.connect(self.on_search_error)
-        self.search_thread.start()
+        self.search_seq += 1
+        self.search_token = CancelToken()
+        self.similar_pending = False
+        self.search_query = search_cache.normalize_query(query) if search_type == "name" else None
+        
+        self.start_task(SearchTask(search_type, query, self.search_seq, self.search_token))
+    
+    def start_task(self, task):
+        """Отправляет запрос в пул потоков"""
+        task.signals.result_ready.connect(self.on_search_finished)
+        task.signals.products_batch.connect(self.on_products_batch)
+        task.signals.similar_ready.connect(self.on_similar_found)
+        task.signals.error.connect(self.on_search_error)
+        self.lookup_pool.start(task)
+        self.update_pool_label()
     
-    def on_search_finished(self, result):
+    def cancel_search(self):
+        """Отменяет текущий поиск: его запрос доработает сам, а ответ будет отброшен"""
+        if self.search_token is not None:
+            self.search_token.cancel()
+            self.search_token = None
+    
+    def on_search_finished(self, seq, result):
         """Обработка завершения поиска"""
+        if seq != self.search_seq:
+            return  # Ответ устаревшего поиска
         self.progress_bar.setVisible(False)
         
         if "error" in result:
@@ -527,68 +857,78 @@ class NutritionApp(QMainWindow):
         if result.get("status") == 1 and result.get("product"):
             product = result["product"]
             self.display_single_product(product, "НАЙДЕННЫЙ ТОВАР")
-            self.stats_label.setText(f"✅ Товар найден по штрихкоду\n📦 {product.get('product_name', 'Неизвестно')}")
+            self.stats_label.setText(f"✅ Товар найден по штрихкоду\n📦 {product.display_name}")
             
             # Для штрихкода ищем похожие товары по категории
             self.find_similar_products(product)
         
-        # Обработка поиска по названию
+        # Обработка поиска по названию (товары уже показаны по мере загрузки страниц)
         elif result.get("products"):
             products = result.get("products", [])
-            self.current_search_results = products
+            if not self.current_search_results:
+                self.add_found_products(products)
             
-            if products:
-                self.stats_label.setText(f"✅ Найдено товаров: {len(products)}\n🔍 По названию: '{self.search_input.text()}'")
-                
-                # Показываем первый товар как основной
-                main_product = products[0]
-                self.display_single_product(main_product, f"ТОВАР: {self.search_input.text().title()}")
-                
-                # Показываем все остальные товары в правой панели
-                self.show_all_products(products)
-            else:
-                self.main_result_display.append("❌ Товары не найдены")
-                self.stats_label.setText("❌ Товары не найдены")
-                self.add_products_message("Товары не найдены. Попробуйте другой запрос.")
+            cache = search_cache.get_search_cache()
+            self.stats_label.setText(
+                f"✅ Найдено товаров: {len(self.current_search_results)}\n🔍 По названию: '{self.search_input.text()}'\n"
+                f"💾 Кэш поиска: {len(cache)} запросов, попаданий {cache.hit_rate:.0%}")
         else:
             self.main_result_display.append("❌ Товар не найден")
             self.stats_label.setText("❌ Товар не найден")
+            self.clear_products()
             self.add_products_message("Товар не найден. Проверьте штрихкод или название.")
     
+    def on_products_batch(self, seq, products):
+        """Очередная страница результатов поиска по названию"""
+        if seq != self.search_seq:
+            return  # Страница устаревшего поиска
+        self.add_found_products(products)
+        self.stats_label.setText(f"⏳ Загружено товаров: {len(self.current_search_results)}\n"
+                                 f"🔍 По названию: '{self.search_input.text()}'")
+    
+    def add_found_products(self, products):
+        """Добавляет найденные товары: первый показывается как основной"""
+        if not self.current_search_results:
+            # Показываем первый товар как основной
+            self.display_single_product(products[0], f"ТОВАР: {self.search_input.text().title()}")
+            self.show_all_products(products)
+        else:
+            self.append_products(products)
+        self.current_search_results.extend(products)
+    
     def find_similar_products(self, product):
-        """Поиск похожих товаров по категории (для штрихкода)"""
-        categories = product.get('categories')
-        if categories:
-            main_category = categories.split(',')[0].strip()
-            if main_category:
-                try:
-                    # Ищем товары из той же категории
-                    url = "https://world.openfoodfacts.org/cgi/search.pl"
-                    params = {
-                        'search_terms': main_category,
-                        'page_size': 10,
-                        'json': 1,
-                        'fields': 'code,product_name,brands,categories,quantity,serving_size,nutriments'
-                    }
-                    
-                    response = requests.get(url, params=params, timeout=10)
-                    if response.status_code == 200:
-                        data = response.json()
-                        similar_products = data.get("products", [])
-                        
-                        # Убираем текущий продукт из похожих
-                        current_code = product.get('code')
-                        similar_products = [p for p in similar_products if p.get('code') != current_code]
-                        
-                        if similar_products:
-                            self.show_all_products(similar_products[:8], "ПОХОЖИЕ ТОВАРЫ")
-                        else:
-                            self.add_products_message("Похожие товары не найдены")
-                except Exception as e:
-                    self.add_products_message("Не удалось найти похожие товары")
-    
-    def on_search_error(self, error_message):
+        """Запуск поиска похожих товаров в фоне (для штрихкода)"""
+        if not product.main_category:
+            return
+        
+        self.add_products_message("🔍 Ищем похожие товары...")
+        self.similar_pending = True
+        # Тот же номер и токен, что у поиска по штрихкоду: отменяются вместе
+        self.start_task(SearchTask("similar", product, self.search_seq, self.search_token))
+    
+    def on_similar_found(self, seq, similar_products):
+        """Заполняет правую панель похожими товарами"""
+        if seq != self.search_seq:
+            return
+        self.similar_pending = False
+        
+        self.clear_products()
+        if similar_products:
+            self.show_all_products(similar_products[:8], "ПОХОЖИЕ ТОВАРЫ")
+        else:
+            self.add_products_message("Похожие товары не найдены")
+    
+    def on_search_error(self, seq, error_message):
         """Обработка ошибки поиска"""
+        if seq != self.search_seq:
+            return
+        if self.similar_pending:
+            # Ошибка поиска похожих товаров: основной товар уже показан
+            self.similar_pending = False
+            print(f"⚠️ Похожие товары: {error_message}")
+            self.clear_products()
+            self.add_products_message("Не удалось найти похожие товары")
+            return
         self.progress_bar.setVisible(False)
         self.main_result_display.append(f"❌ Ошибка: {error_message}")
         self.main_result_display.append("🔧 Проверьте подключение к интернету")
@@ -600,30 +940,92 @@ class NutritionApp(QMainWindow):
             self.add_products_message("Товары не найдены")
             return
         
-        # Добавляем заголовок
-        title_label = QLabel(f"{title} ({len(products)})")
-        title_label.setStyleSheet("font-weight: bold; color: #2196F3; font-size: 12px; margin: 5px;")
-        title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.products_layout.addWidget(title_label)
-        
-        # Добавляем товары
-        for i, product in enumerate(products):
-            product_widget = SimilarProductWidget(product, self)
-            self.products_layout.addWidget(product_widget)
+        self.products_title = title
+        self.products_title_label.setVisible(True)
+        self.products_model.set_products(products)
+        self.update_products_title()
+        self.prefetch_timer.start()
+    
+    def append_products(self, products):
+        """Дописывает товары в конец правой панели"""
+        self.products_model.append_products(products)
+        self.update_products_title()
+        self.prefetch_timer.start()
+    
+    def update_products_title(self):
+        self.products_title_label.setText(f"{self.products_title} ({self.products_model.rowCount()})")
+    
+    def prefetch_visible_products(self):
+        """Ставит в очередь предзагрузки видимые товары, затем следующую страницу"""
+        rows = self.products_model.rowCount()
+        if not rows:
+            return
+        viewport = self.products_view.viewport()
+        first = self.products_view.indexAt(QPoint(0, 0)).row()
+        last = self.products_view.indexAt(QPoint(0, viewport.height() - 1)).row()
+        first = max(first, 0)
+        last = rows - 1 if last < 0 else last
+        end = min(rows, last + 1 + (last - first + 1))
+        codes = [self.products_model.index(row).data(PRODUCT_ROLE).code for row in range(first, end)]
+        self.prefetcher.schedule(codes)
+    
+    def show_product_details(self, index):
+        """Показать детали выбранного товара в основном окне"""
+        product = index.data(PRODUCT_ROLE)
+        if not product:
+            return
+        code = product.code
+        cached = product_cache.get_cache().get(code) if code else None
+        if cached is not None and cached[0].get("status") == 1 and cached[0].get("product"):
+            # Полная карточка уже предзагружена
+            self.details_code = None
+            self.display_single_product(core.products_from_dicts([cached[0]["product"]])[0], "ВЫБРАННЫЙ ТОВАР")
+            return
+        self.display_single_product(product, "ВЫБРАННЫЙ ТОВАР")
+        if code and offline_store.get_store() is None:
+            # Показываем краткую карточку, полная подставится после загрузки
+            self.details_code = code
+            self.prefetcher.request(code)
+    
+    def on_details_ready(self, code, result):
+        """Полная карточка загружена: обновляем, если товар всё ещё выбран"""
+        if code == self.details_code:
+            self.details_code = None
+            self.display_single_product(result["product"], "ВЫБРАННЫЙ ТОВАР")
     
     def add_products_message(self, message):
-        """Добавляет сообщение в панель товаров"""
-        message_label = QLabel(message)
-        message_label.setStyleSheet("color: #666; font-style: italic; margin: 10px;")
-        message_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.products_layout.addWidget(message_label)
+        """Показывает сообщение в панели товаров"""
+        self.products_message_label.setText(message)
+        self.products_message_label.setVisible(True)
     
     def clear_products(self):
         """Очищает панель товаров"""
-        while self.products_layout.count():
-            child = self.products_layout.takeAt(0)
-            if child.widget():
-                child.widget().deleteLater()
+        self.products_model.clear()
+        self.prefetcher.reset()
+        self.details_code = None
+        self.products_title_label.setVisible(False)
+        self.products_message_label.setVisible(False)
+    
+    def update_pool_label(self):
+        """Очередь и загрузка пула потоков"""
+        stats = self.lookup_pool.stats()
+        flights = singleflight.get_single_flight().stats()
+        traffic = sum(kind["wire_bytes"] for kind in off_client.traffic_stats().values())
+        self.pool_label.setText(
+            f"⚙️ Потоки: занято {stats['active']} из {stats['workers']}, в очереди {stats['queued']}, "
+            f"загрузка {stats['utilisation']:.0%}; объединено запросов: {flights['collapsed']}; "
+            f"трафик: {traffic / 1024:.0f} КБ")
+    
+    def closeEvent(self, event):
+        self.cancel_search()
+        self.prefetcher.reset()
+        # Отменённые запросы прерываются между кусками ответа; ждём их не дольше
+        # CLOSE_WAIT_MS, затем пул отпускается - медленная сеть не держит ни окно,
+        # ни выход из программы
+        if not self.lookup_pool.shutdown(CLOSE_WAIT_MS):
+            print("⚠️ Запросы пула не завершились при закрытии окна, выход без ожидания")
+        self.async_runner.shutdown()
+        super().closeEvent(event)
     
     def display_search_status(self, message):
         """Отображает статус поиска"""
@@ -638,59 +1040,54 @@ class NutritionApp(QMainWindow):
         self.main_result_display.append("=" * 50)
         
         # Название товара
-        product_name = product.get('product_name', 'Не указано')
-        if not product_name or product_name == 'None':
-            product_name = product.get('product_name_en', 'Не указано')
-        
-        self.main_result_display.append(f"🍎 <b>Название:</b> {product_name}")
+        self.main_result_display.append(f"🍎 <b>Название:</b> {product.product_name or product.product_name_en or 'Не указано'}")
         
         # Бренд
-        brand = product.get('brands', 'Не указан')
-        if brand and brand != 'None':
-            self.main_result_display.append(f"🏷️ <b>Бренд:</b> {brand}")
+        if product.brands:
+            self.main_result_display.append(f"🏷️ <b>Бренд:</b> {product.brands}")
         
         # Штрихкод (если есть)
-        code = product.get('code')
-        if code:
-            self.main_result_display.append(f"📱 <b>Штрихкод:</b> {code}")
+        if product.code:
+            self.main_result_display.append(f"📱 <b>Штрихкод:</b> {product.code}")
         
         # Упаковка
-        quantity = product.get('quantity')
-        if quantity:
-            self.main_result_display.append(f"📦 <b>Упаковка:</b> {quantity}")
+        if product.quantity:
+            self.main_result_display.append(f"📦 <b>Упаковка:</b> {product.quantity}")
         
         # Размер порции
-        serving_size = product.get('serving_size')
-        if serving_size:
-            self.main_result_display.append(f"🍽️ <b>Размер порции:</b> {serving_size}")
+        if product.serving_size:
+            self.main_result_display.append(f"🍽️ <b>Размер порции:</b> {product.serving_size}")
         
         # Категория
-        categories = product.get('categories')
-        if categories:
-            main_category = categories.split(',')[0].strip()
-            self.main_result_display.append(f"📋 <b>Категория:</b> {main_category}")
+        if product.main_category:
+            self.main_result_display.append(f"📋 <b>Категория:</b> {product.main_category}")
         
         # Пищевая ценность
-        nutriments = product.get("nutriments", {})
-        if nutriments:
+        nutrition = product.nutrition
+        if nutrition:
             self.main_result_display.append("\n📊 <b>ПИЩЕВАЯ ЦЕННОСТЬ (на 100г):</b>")
             self.main_result_display.append("-" * 30)
             
-            # Основные нутриенты
-            nutrients_to_show = {
-                'energy-kcal_100g': ('🔥 Калории', '#E91E63'),
-                'proteins_100g': ('🥚 Белки', '#4CAF50'),
-                'carbohydrates_100g': ('🍞 Углеводы', '#FF9800'),
-                'sugars_100g': ('🍭 Сахар', '#9C27B0'),
-                'fat_100g': ('🥑 Жиры', '#795548'),
-                'fiber_100g': ('🌾 Клетчатка', '#8BC34A'),
-                'salt_100g': ('🧂 Соль', '#607D8B')
-            }
-            
-            for key, (name, color) in nutrients_to_show.items():
-                value = nutriments.get(key)
+            for field, (name, color) in NUTRIENTS_TO_SHOW.items():
+                value = getattr(nutrition, field)
                 if value is not None:
-                    self.main_result_display.append(f"<span style='color: {color};'>   • {name}: <b>{value}</b></span>")
+                    note = KCAL_SOURCE_NOTES.get(nutrition.kcal_source, "") if field == "kcal_100g" else ""
+                    self.main_result_display.append(
+                        f"<span style='color: {color};'>   • {name}: <b>{value:.4g}</b>{note}</span>")
+            
+            # На порцию и на упаковку - по массе из serving_size и quantity
+            for title, grams, values in (
+                    ("НА ПОРЦИЮ", nutrition.serving_g,
+                     (nutrition.kcal_serving, nutrition.proteins_serving, nutrition.fat_serving,
+                      nutrition.carbohydrates_serving)),
+                    ("НА УПАКОВКУ", nutrition.package_g,
+                     (nutrition.kcal_package, nutrition.proteins_package, nutrition.fat_package,
+                      nutrition.carbohydrates_package))):
+                if grams is None or values[0] is None:
+                    continue
+                kcal, proteins, fat, carbs = (f"{value:.4g}" if value is not None else "-" for value in values)
+                self.main_result_display.append(
+                    f"\n🍽️ <b>{title} ({grams:g} г):</b> {kcal} ккал, Б {proteins} / Ж {fat} / У {carbs} г")
             
         else:
             self.main_result_display.append("\n⚠️ <b>Информация о пищевой ценности отсутствует</b>")
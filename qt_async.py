@@ -0,0 +1,85 @@
+"""
+Мост между asyncio и Qt.
+
+Один фоновый поток с циклом событий asyncio на всё приложение: окно
+запускает в нём сколько угодно корутин (AsyncRunner.submit), а результаты
+приходят в слоты в потоке интерфейса через сигнал. QThread на каждый поиск
+не создаётся. runner.client - общий AsyncOFFClient (кэш товаров и
+singleflight - те же, что у пула потоков окна).
+"""
+import asyncio
+import threading
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from core.async_client import AsyncOFFClient
+
+
+class AsyncTask:
+    """Запущенная корутина; cancel() гарантирует, что колбэки не вызовутся"""
+
+    def __init__(self, future, on_result, on_error):
+        self.future = future
+        self.on_result = on_result
+        self.on_error = on_error
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+        self.future.cancel()
+
+    def done(self):
+        return self.future.done()
+
+
+class AsyncRunner(QObject):
+    # Из потока asyncio в поток интерфейса: задача, результат, ошибка
+    task_done = pyqtSignal(object, object, object)
+
+    def __init__(self, parent=None, limit=20, limit_per_host=8):
+        super().__init__(parent)
+        self.loop = asyncio.new_event_loop()
+        self.client = AsyncOFFClient(limit=limit, limit_per_host=limit_per_host)
+        self.task_done.connect(self._deliver)
+        self._thread = threading.Thread(target=self._run_loop, name="asyncio-loop", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro, on_result=None, on_error=None) -> AsyncTask:
+        """Запускает корутину в цикле asyncio, колбэки вызываются в потоке интерфейса"""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        task = AsyncTask(future, on_result, on_error)
+        future.add_done_callback(lambda f: self._on_future_done(task))
+        return task
+
+    def _on_future_done(self, task):
+        # Поток asyncio
+        if task.future.cancelled():
+            return
+        error = task.future.exception()
+        result = None if error is not None else task.future.result()
+        self.task_done.emit(task, result, error)
+
+    def _deliver(self, task, result, error):
+        # Поток интерфейса
+        if task.cancelled:
+            return
+        if error is not None:
+            if task.on_error:
+                task.on_error(error)
+        elif task.on_result:
+            task.on_result(result)
+
+    def shutdown(self, timeout=5):
+        """Закрывает клиент и останавливает цикл событий"""
+        if not self.loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.client.close(), self.loop).result(timeout)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
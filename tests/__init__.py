@@ -0,0 +1,3 @@
+"""
+Тесты ядра core. Запуск из корня репозитория: python -m pytest
+"""
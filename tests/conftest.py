@@ -0,0 +1,36 @@
+"""
+Общие фикстуры: заглушка Open Food Facts и временные кэши вместо ~/.cache/pz5.
+"""
+import pytest
+
+from benchmarks.stub_server import StubServer
+from core import off_client
+from core import product_cache
+from core import search_cache
+
+
+@pytest.fixture
+def temp_product_cache(tmp_path, monkeypatch):
+    """Общий кэш товаров (product_cache.get_cache) - временный, поиск - пустой"""
+    cache = product_cache.ProductCache(str(tmp_path / "products.sqlite3"))
+    monkeypatch.setattr(product_cache, "_cache", cache)
+    search_cache.get_search_cache().clear()
+    yield cache
+    search_cache.get_search_cache().clear()
+    cache.close()
+
+
+@pytest.fixture
+def upstream(monkeypatch, temp_product_cache):
+    """Запуск заглушки: upstream(delay=..., fail_every=...); off_client.BASE - на неё"""
+    servers = []
+
+    def start(**options):
+        server = StubServer(**options).__enter__()
+        servers.append(server)
+        monkeypatch.setattr(off_client, "BASE", server.base)
+        return server
+
+    yield start
+    for server in servers:
+        server.__exit__(None, None, None)
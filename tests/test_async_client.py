@@ -0,0 +1,77 @@
+"""
+Асинхронный клиент против заглушки: общий кэш товаров и общая группа
+singleflight с потоками, 404, похожие товары.
+"""
+import asyncio
+import threading
+
+import core
+from benchmarks.stub_server import make_product
+from core.async_client import AsyncOFFClient
+from core.product_record import products_from_dicts
+
+
+def run(coro_fn):
+    """asyncio.run для корутины с клиентом: async with AsyncOFFClient() as client"""
+    async def main():
+        async with AsyncOFFClient() as client:
+            return await coro_fn(client)
+    return asyncio.run(main())
+
+
+def test_concurrent_barcodes_collapse_and_are_cached(upstream, temp_product_cache):
+    stub = upstream(delay=0.05)
+
+    async def lookups(client):
+        return await asyncio.gather(*(client.get_product_by_barcode("4600000000001") for _ in range(5)))
+
+    results = run(lookups)
+    assert all(result["status"] == 1 for result in results)
+    assert stub.requests_count == 1
+
+    # Повтор - из общего кэша товаров, в том числе для синхронного кода
+    assert run(lambda client: client.get_product_by_barcode("4600000000001"))["status"] == 1
+    assert core.get_product_by_barcode("4600000000001")["product"]["code"] == "4600000000001"
+    assert stub.requests_count == 1
+    assert temp_product_cache.stats()["hits"] == 2
+
+
+def test_thread_and_coroutine_share_one_request(upstream):
+    stub = upstream(delay=0.3)
+    results = []
+    thread = threading.Thread(target=lambda: results.append(core.get_product_by_barcode("4600000000002")))
+    thread.start()
+
+    async def lookup(client):
+        # Поток уже ждёт ответа API: корутина присоединяется к его запросу
+        await asyncio.sleep(0.1)
+        return await client.get_product_by_barcode("4600000000002")
+
+    result = run(lookup)
+    thread.join(5)
+    assert result["status"] == 1 and results[0] is result
+    assert stub.requests_count == 1
+
+
+def test_not_found_is_not_cached(upstream, temp_product_cache):
+    stub = upstream()
+    for _ in range(2):
+        assert run(lambda client: client.get_product_by_barcode("abc"))["status"] == 0
+    assert stub.requests_count == 2
+    assert temp_product_cache.get("abc") is None
+
+
+def test_find_similar_products(upstream):
+    stub = upstream()
+    product = products_from_dicts([make_product("1000001")])[0]
+
+    async def similar(client):
+        return await asyncio.gather(client.find_similar_products(product),
+                                    client.find_similar_products(product))
+
+    first, second = run(similar)
+    # Категория - первая из categories, сам товар исключён
+    assert [p.code for p in first] == [str(1000000 + i) for i in range(10) if i != 1]
+    assert [p.product_name for p in first][:2] == ["Snacks 0", "Snacks 2"]
+    assert [p.code for p in second] == [p.code for p in first]
+    assert stub.requests_count == 1
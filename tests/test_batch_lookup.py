@@ -0,0 +1,65 @@
+"""
+Пакетный поиск (batch_lookup.py) против локальной заглушки: повторы при 503,
+404, исчерпание повторов и потоковая выдача с ограничением одновременных
+запросов.
+"""
+import pytest
+import requests
+
+from batch_lookup import batch_lookup, enrich_barcode, lookup_with_retries
+
+
+def test_503_is_retried_then_succeeds(upstream):
+    stub = upstream(fail_every=2)
+    assert lookup_with_retries("4600000000001")["status"] == 1
+    # Второй запрос к заглушке - 503, третий - повтор
+    result = lookup_with_retries("4600000000002", backoff=0.01)
+    assert result["status"] == 1 and result["product"]["code"] == "4600000000002"
+    assert stub.requests_count == 3
+
+
+def test_404_is_not_found(upstream):
+    stub = upstream()
+    row = enrich_barcode("abc")
+    assert row == {"code": "abc", "status": "not_found"}
+    # 404 не повторяется
+    assert stub.requests_count == 1
+
+
+def test_retries_run_out(upstream):
+    stub = upstream(fail_every=1)
+    with pytest.raises(requests.HTTPError):
+        lookup_with_retries("4600000000001", retries=2, backoff=0.01)
+    assert stub.requests_count == 3
+
+    row = enrich_barcode("4600000000002", retries=0)
+    assert row["status"] == "error" and "503" in row["error"]
+
+
+def test_found_row_has_nutrition(upstream):
+    upstream()
+    row = enrich_barcode("4600000000001")
+    assert row["status"] == "found"
+    assert row["product_name"] == "Product 4600000000001"
+    assert row["kcal_100g"] == 500 and row["kcal_serving"] == 125
+    assert row["kcal_source"] == "label"
+
+
+def test_results_stream_with_bounded_in_flight(upstream):
+    upstream(delay=0.01)
+    n, workers = 40, 2
+    consumed = []
+
+    def barcodes():
+        for i in range(n):
+            consumed.append(i)
+            yield str(4600000000000 + i)
+
+    rows = []
+    for row in batch_lookup(barcodes(), workers=workers, rate=0):
+        # Вход читается лениво: в работе не больше 2 * workers штрихкодов
+        assert len(consumed) - len(rows) <= 2 * workers
+        rows.append(row)
+    assert len(rows) == n
+    assert {row["status"] for row in rows} == {"found"}
+    assert sorted(row["code"] for row in rows) == [str(4600000000000 + i) for i in range(n)]
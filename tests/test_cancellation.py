@@ -0,0 +1,43 @@
+"""
+Отмена: чтение потокового ответа прерывается между кусками.
+"""
+import pytest
+
+from core import off_client
+from core.cancellation import CancelToken, Cancelled
+
+
+class FakeResponse:
+    """Потоковый ответ requests: тело отдаётся кусками"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.raw = None
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        yield from self.chunks
+
+    def close(self):
+        self.closed = True
+
+
+def test_stream_items_stops_after_cancel():
+    token = CancelToken()
+    response = FakeResponse([b'{"products": [{"code": "1"},', b' {"code": "2"},', b' {"code": "3"}]}'])
+    received = []
+    with pytest.raises(Cancelled):
+        for item in off_client.stream_items(response, token=token):
+            received.append(item["code"])
+            token.cancel()
+    # Следующий кусок уже не читается, ответ закрыт
+    assert received == ["1"]
+    assert response.closed
+
+
+def test_stream_items_without_cancel_reads_everything():
+    response = FakeResponse([b'{"count": 2, "products": [{"code": "1"},', b' {"code": "2"}]}'])
+    meta = {}
+    items = list(off_client.stream_items(response, "products", meta, token=CancelToken()))
+    assert [item["code"] for item in items] == ["1", "2"]
+    assert meta["count"] == 2
@@ -0,0 +1,39 @@
+"""
+Разбор товара (decode_product): только PRODUCT_FIELDS, типы полей у msgspec.
+"""
+import pytest
+
+from core import json_codec
+
+LINE = (b'{"code": "1", "product_name": "Milk", "unique_scans_n": 3, "ingredients_text": "milk",'
+        b' "nutriments": {"energy-kj_100g": "2250", "fat_100g": 31}, "images": {"front": {}}}')
+
+
+@pytest.fixture(params=json_codec.available_backends())
+def backend(request):
+    json_codec.set_backend(request.param)
+    yield request.param
+    json_codec.set_backend(None)
+
+
+def test_decode_product_keeps_product_fields(backend):
+    assert json_codec.decode_product(LINE) == {
+        "code": "1", "product_name": "Milk", "unique_scans_n": 3,
+        "nutriments": {"energy-kj_100g": "2250", "fat_100g": 31}}
+    assert json_codec.decode_product('{"product_name": "Без штрихкода"}') == {"product_name": "Без штрихкода"}
+
+
+@pytest.mark.parametrize("line", [
+    b'{"code": 4600000000001}',
+    b'{"code": "1", "nutriments": {"fat_100g": {"value": 31}}}',
+    b'{"code": "1", "unique_scans_n": "3"}',
+    b'{"code": "1", "brands": ["Stub"]}',
+])
+def test_msgspec_rejects_wrong_types_as_value_error(line):
+    pytest.importorskip("msgspec")
+    json_codec.set_backend("msgspec")
+    try:
+        with pytest.raises(ValueError):
+            json_codec.decode_product(line)
+    finally:
+        json_codec.set_backend(None)
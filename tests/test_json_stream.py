@@ -0,0 +1,91 @@
+"""
+Потоковый разбор ответа поиска: куски, разрезанные где угодно, мета-поля
+до и после массива, пустой массив, обрезанный и не-JSON ответ.
+"""
+import json
+
+import pytest
+
+from core.json_stream import iter_items
+
+BODY = json.dumps({
+    "count": 12345,
+    "page": 1,
+    "products": [
+        {"code": "4600000000001", "product_name": "Молоко «Домик»", "nutriments": {"energy-kcal_100g": 59.5}},
+        {"code": "4600000000002", "product_name": "Milk \"chocolate\" \\ 🍫", "nutriments": {"fat_100g": 31}},
+        {"code": "3", "unique_scans_n": 1e3, "tags": [1, -2.5, None, True]},
+    ],
+    "skip": 0,
+}, ensure_ascii=False).encode("utf-8")
+
+EXPECTED = json.loads(BODY)
+
+
+def parse(chunks, key="products"):
+    meta = {}
+    return list(iter_items(chunks, key, meta)), meta
+
+
+@pytest.mark.parametrize("split", range(1, len(BODY)))
+def test_any_split_point(split):
+    # Разрез внутри строки, числа, escape-последовательности и символа UTF-8
+    items, meta = parse([BODY[:split], BODY[split:]])
+    assert items == EXPECTED["products"]
+    assert meta == {"count": 12345, "page": 1, "skip": 0}
+
+
+def test_one_byte_chunks():
+    items, meta = parse(BODY[i:i + 1] for i in range(len(BODY)))
+    assert items == EXPECTED["products"]
+    assert meta["skip"] == 0
+
+
+def test_str_chunks():
+    text = BODY.decode("utf-8")
+    items, meta = parse(text[i:i + 7] for i in range(0, len(text), 7))
+    assert items == EXPECTED["products"]
+
+
+def test_number_at_chunk_end_is_not_cut():
+    # "12" в конце куска могло быть началом "12345"
+    items, meta = parse([b'{"products": [], "count": 12', b'345}'])
+    assert items == []
+    assert meta == {"count": 12345}
+
+
+@pytest.mark.parametrize("body", [b'{"products": []}', b'{"products":[ ] ,"count":0}', b'{}', b' { } '])
+def test_empty(body):
+    items, meta = parse([body])
+    assert items == []
+
+
+def test_meta_after_array_and_other_arrays():
+    body = b'{"products": [{"code": "1"}], "count": 1, "tags": [{"code": "x"}], "products_count": 1}'
+    items, meta = parse([body])
+    assert items == [{"code": "1"}]
+    # Массив не под ключом key - мета-поле целиком
+    assert meta == {"count": 1, "tags": [{"code": "x"}], "products_count": 1}
+
+
+def test_items_are_yielded_before_body_ends():
+    def chunks():
+        yield b'{"products": [{"code": "1"}, '
+        raise AssertionError("второй кусок запрошен до первого товара")
+
+    assert next(iter_items(chunks())) == {"code": "1"}
+
+
+@pytest.mark.parametrize("body", [
+    b'{"products": [{"code": "1"}, {"code": "2"',     # обрезан внутри товара
+    b'{"products": [{"code": "1"}',                   # обрезан после товара
+    b'{"products": [{"code": "1"}], "count": 1',      # нет закрывающей скобки
+    b'{"products": [{"code": "\xd0',                   # обрезан внутри символа UTF-8
+    b'<html><body>502 Bad Gateway</body></html>',
+    b'',
+    b'[{"code": "1"}]',
+    b'{"products": [{"code": "1"} {"code": "2"}]}',
+])
+def test_truncated_or_not_json_raises_value_error(body):
+    with pytest.raises(ValueError):
+        parse([body[:len(body) // 2], body[len(body) // 2:]])
@@ -0,0 +1,62 @@
+"""
+Локальный сервис: POST /batch не задерживает остальные эндпоинты, ответы
+из кэша - без очереди за сетевыми запросами.
+"""
+import asyncio
+import time
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from lookup_service import LookupService
+
+
+def run_service(service, scenario):
+    async def main():
+        async with TestClient(TestServer(service.make_app())) as client:
+            return await scenario(client)
+
+    return asyncio.run(main())
+
+
+def test_cached_product_is_not_queued_behind_batch(upstream):
+    stub = upstream(delay=0.05)
+    # Пакет из 40 штрихкодов при 20 запросах в секунду идёт около 2 с
+    service = LookupService(workers=2, rate=20, batch_workers=2)
+
+    async def scenario(client):
+        assert (await client.get("/product/42")).status == 200
+        batch = asyncio.create_task(client.post("/batch", json=[str(2000 + i) for i in range(40)]))
+        await asyncio.sleep(0.3)
+        start = time.perf_counter()
+        cached = await client.get("/product/42")
+        cached_time = time.perf_counter() - start
+        start = time.perf_counter()
+        fresh = await client.get("/product/77")
+        fresh_time = time.perf_counter() - start
+        response = await batch
+        return cached, cached_time, fresh, fresh_time, await response.json()
+
+    cached, cached_time, fresh, fresh_time, body = run_service(service, scenario)
+    assert cached.status == 200 and cached_time < 0.2
+    # Сетевой запрос ждёт в ограничителе не больше batch_workers запросов пакета
+    assert fresh.status == 200 and fresh_time < 1.0
+    assert body["count"] == 40
+    assert all(result["status"] == "found" for result in body["results"])
+    assert stub.requests_count == 42
+
+
+def test_batch_of_cached_items_does_not_touch_api(upstream):
+    stub = upstream()
+    service = LookupService(workers=2, rate=0, batch_workers=1)
+
+    async def scenario(client):
+        first = await (await client.post("/batch", json=["1", "2", "name\tmilk"])).json()
+        requests = stub.requests_count
+        second = await (await client.post("/batch", json=["2", "1", "name\tmilk"] * 10)).json()
+        return first, requests, second
+
+    first, requests, second = run_service(service, scenario)
+    assert [result["status"] for result in first["results"]] == ["found"] * 3
+    assert second["count"] == 30
+    assert [result["query"] for result in second["results"][:3]] == ["2", "1", "milk"]
+    assert stub.requests_count == requests
@@ -0,0 +1,101 @@
+"""
+Пищевая ценность: масса порции из текста, порядок расчёта калорийности
+(этикетка -> кДж -> БЖУ -> NaN) и совпадение extract_kcal с normalize.
+"""
+import math
+
+import numpy as np
+import pytest
+
+from core.nutrient_rules import KCAL_FROM_KJ, KCAL_FROM_MACROS, KCAL_LABEL, KCAL_MISSING, parse_grams
+from core.nutrients import normalize, nutrient_columns
+from core.nutrition import KCAL_FIELDS, extract_kcal
+
+
+@pytest.mark.parametrize("text, grams", [
+    ("330 ml", 330),
+    ("2 x 25 g", 50),
+    ("2×25г", 50),
+    ("1 portion (30 g)", 30),
+    ("30 g (1 oz)", 30),            # метрическая масса точнее пересчёта унций
+    ("1 oz (28 g)", 28),
+    ("1,5 l", 1500),
+    ("6 x 1,5 L", 9000),
+    ("500 мг", 0.5),
+    ("12 fl. oz", 12 * 29.5735),
+    ("1 kg", 1000),
+])
+def test_parse_grams(text, grams):
+    assert parse_grams(text) == pytest.approx(grams)
+
+
+@pytest.mark.parametrize("text", [None, "", "1 biscuit", "g", "25 grapes", "половина пачки"])
+def test_parse_grams_unparseable_is_nan(text):
+    assert math.isnan(parse_grams(text))
+
+
+# (nutriments, ккал на 100 г, источник)
+KCAL_CASES = [
+    # Этикетка важнее кДж и БЖУ
+    ({"energy-kcal_100g": 100, "energy-kj_100g": 1000, "proteins_100g": 1, "fat_100g": 1,
+      "carbohydrates_100g": 1}, 100, KCAL_LABEL),
+    ({"energy-kcal_value": "55"}, 55, KCAL_LABEL),
+    # Нет ккал - из кДж (energy_100g - запасной ключ), раньше БЖУ
+    ({"energy-kj_100g": 418.4, "proteins_100g": 10, "fat_100g": 10, "carbohydrates_100g": 10}, 100, KCAL_FROM_KJ),
+    ({"energy_100g": "836.8"}, 200, KCAL_FROM_KJ),
+    # Нет ни ккал, ни кДж - по БЖУ 4/9/4
+    ({"proteins_100g": 10, "fat_100g": 5, "carbohydrates_100g": "20", "energy-kcal_100g": ""}, 165, KCAL_FROM_MACROS),
+    # Неполные БЖУ не дают оценки
+    ({"proteins_100g": 10, "fat_100g": 5}, math.nan, KCAL_MISSING),
+    ({"energy-kcal_100g": "n/a"}, math.nan, KCAL_MISSING),
+    ({}, math.nan, KCAL_MISSING),
+]
+
+
+def test_normalize_kcal_order_and_source():
+    table = normalize(nutrient_columns(nutriments for nutriments, _, _ in KCAL_CASES))
+    for i, (nutriments, kcal, source) in enumerate(KCAL_CASES):
+        if math.isnan(kcal):
+            assert np.isnan(table["kcal_100g"][i])
+        else:
+            assert table["kcal_100g"][i] == pytest.approx(kcal)
+        assert table["kcal_source"][i] == source
+    assert table["kcal_source"].dtype == np.int8
+
+
+def test_normalize_serving_and_package():
+    columns = nutrient_columns([{"energy-kcal_100g": 200, "fat_100g": 10, "fat_serving": 4},
+                                {"energy-kcal_100g": 200}])
+    table = normalize(columns, ["25 g", None], ["2 x 100 g", "1 biscuit"])
+    # Значение с этикетки на порцию не пересчитывается
+    assert table["kcal_serving"].tolist()[0] == 50 and table["fat_serving"][0] == 4
+    assert table["package_g"][0] == 200 and table["kcal_package"][0] == 400
+    # Без массы порции и упаковки - NaN
+    assert np.isnan(table["kcal_serving"][1]) and np.isnan(table["kcal_package"][1])
+
+
+@pytest.mark.parametrize("nutriments, kcal, source", KCAL_CASES)
+def test_extract_kcal_source(nutriments, kcal, source):
+    data = extract_kcal(nutriments, with_source=True)
+    if math.isnan(kcal):
+        assert "kcal_100g" not in data and "kcal_source" not in data
+    else:
+        assert data["kcal_100g"] == pytest.approx(kcal)
+        assert data["kcal_source"] == {KCAL_LABEL: "label", KCAL_FROM_KJ: "kj", KCAL_FROM_MACROS: "macros"}[source]
+
+
+@pytest.mark.parametrize("serving_size", [None, "30 g", "1 portion (25 g)", "1 biscuit"])
+def test_extract_kcal_matches_normalize(serving_size):
+    nutriments_list = [nutriments for nutriments, _, _ in KCAL_CASES] + [
+        {"energy-kcal_100g": 250, "proteins_100g": "7,5", "fat_serving": 3, "carbohydrates_100g": 60},
+        {"proteins_serving": 2, "energy-kcal_serving": 120},
+    ]
+    table = normalize(nutrient_columns(nutriments_list), [serving_size] * len(nutriments_list))
+    for i, nutriments in enumerate(nutriments_list):
+        data = extract_kcal(nutriments, serving_size)
+        for field, column in KCAL_FIELDS.items():
+            expected = table[column][i]
+            if np.isnan(expected):
+                assert field not in data
+            else:
+                assert data[field] == pytest.approx(expected)
@@ -0,0 +1,93 @@
+"""
+Офлайн-база: чтение дампа (JSONL, CSV/TSV, .gz), импорт и ответ по штрихкоду.
+"""
+import gzip
+import os
+import shutil
+
+import pytest
+
+from core.offline_store import OfflineStore, iter_dump
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+JSONL = os.path.join(FIXTURES, "dump.jsonl")
+CSV = os.path.join(FIXTURES, "dump.csv")
+
+
+def gzipped(path, tmp_path):
+    """Копия фикстуры, сжатая gzip"""
+    target = tmp_path / (os.path.basename(path) + ".gz")
+    with open(path, "rb") as src, gzip.open(target, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    return str(target)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = OfflineStore(str(tmp_path / "off.sqlite3"))
+    yield store
+    store.close()
+
+
+def test_iter_dump_jsonl_skips_broken_lines():
+    products = list(iter_dump(JSONL))
+    # Обрезанная строка пропускается, пустая - тоже
+    assert [product.get("code") for product in products] == [
+        "4600000000001", "4600000000002", None, "4600000000004"]
+    # Разбираются только нужные поля товара
+    assert "ingredients_text" not in products[0]
+    assert products[0]["nutriments"]["energy-kcal_100g"] == 59
+
+
+def test_iter_dump_tsv_keeps_quotes(tmp_path):
+    tsv = tmp_path / "dump.tsv"
+    shutil.copy(CSV, tsv)
+    for path in (CSV, str(tsv)):
+        products = list(iter_dump(path))
+        assert [product["code"] for product in products] == ["4600000000011", "", "4600000000012"]
+        # QUOTE_NONE: кавычки в названии - часть значения, а не разметка CSV
+        assert products[0]["product_name"] == 'Сок "Яблоко"'
+
+
+@pytest.mark.parametrize("path", [JSONL, CSV])
+def test_iter_dump_gz_matches_plain(path, tmp_path):
+    assert list(iter_dump(gzipped(path, tmp_path))) == list(iter_dump(path))
+
+
+def test_import_jsonl_and_lookup_barcode(store):
+    assert store.import_dump(JSONL) == 3
+    assert len(store) == 3
+
+    result = store.lookup_barcode("4600000000002")
+    assert result["status"] == 1
+    product = result["product"]
+    assert product["product_name"] == "Milk chocolate"
+    assert product["serving_size"] == "25 g"
+    # Числа-строки дампа хранятся числами, ненужные нутриенты отброшены
+    assert product["nutriments"] == {"energy-kj_100g": 2250.0, "proteins_100g": 7,
+                                     "fat_100g": 31, "carbohydrates_100g": 56}
+
+    missing = store.lookup_barcode("4600000000003")
+    assert missing == {"code": "4600000000003", "status": 0, "status_verbose": "product not found"}
+
+
+def test_import_csv_gz_and_lookup_barcode(store, tmp_path):
+    assert store.import_dump(gzipped(CSV, tmp_path)) == 2
+
+    product = store.lookup_barcode("4600000000011")["product"]
+    assert product["product_name"] == 'Сок "Яблоко"'
+    assert product["quantity"] == "1 l"
+    # Пустые и нечисловые колонки нутриентов пропускаются
+    assert product["nutriments"] == {"energy-kcal_100g": 46.0, "proteins_100g": 0.5}
+    assert store.lookup_barcode("4600000000012")["product"]["nutriments"] == {
+        "energy-kcal_100g": 250.0, "fat_100g": 1.2}
+
+
+def test_import_is_idempotent_and_builds_name_index(store):
+    store.import_dump(JSONL, batch_size=1)
+    assert store.import_dump(JSONL) == 3
+    assert len(store) == 3
+    # Популярные товары (unique_scans_n) первыми
+    assert [product["code"] for product in store.search_names("мол")] == ["4600000000001"]
+    assert [product["code"] for product in store.search_names("milk")] == ["4600000000002"]
+    assert [product["code"] for product in store.search_names("домик")] == ["4600000000001", "4600000000004"]
@@ -0,0 +1,152 @@
+"""
+Кэш товаров: TTL, вытеснение LRU, stale-while-revalidate и ответ из кэша
+при ошибке API.
+"""
+import threading
+import time
+
+import pytest
+
+from core import product_cache
+from core.product_cache import ProductCache
+
+TTL = 100
+MAX_STALE = 1000
+
+
+class Clock:
+    """Подменяет time.time в product_cache"""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+def found(barcode, name="Товар"):
+    return {"code": barcode, "status": 1, "product": {"code": barcode, "product_name": name}}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(product_cache, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = ProductCache(str(tmp_path / "cache.db"), ttl=TTL, max_stale=MAX_STALE)
+    yield cache
+    cache.close()
+
+
+def test_fresh_entry_is_served_without_fetch(cache, clock):
+    cache.put("1", found("1"))
+    clock.now += TTL - 1
+    assert cache.get_or_fetch("1", pytest.fail) == found("1")
+    assert cache.stats()["hits"] == 1
+
+
+def test_entry_older_than_max_stale_is_fetched_again(cache, clock):
+    cache.put("1", found("1", "Старое"))
+    clock.now += MAX_STALE + 1
+    assert cache.get_or_fetch("1", lambda code: found(code, "Новое"))["product"]["product_name"] == "Новое"
+    assert cache.get("1")[0]["product"]["product_name"] == "Новое"
+    assert cache.stats()["misses"] == 1
+
+
+def test_not_found_response_is_not_cached(cache):
+    missing = {"code": "2", "status": 0, "status_verbose": "product not found"}
+    assert cache.get_or_fetch("2", lambda code: missing) == missing
+    assert cache.get("2") is None
+
+
+def test_stale_entry_is_served_and_refreshed_in_background(cache, clock):
+    cache.put("1", found("1", "Старое"))
+    clock.now += TTL + 1
+    release = threading.Event()
+    calls = []
+
+    def fetch(code):
+        calls.append(code)
+        release.wait(5)
+        return found(code, "Новое")
+
+    # Устаревшая запись отдаётся сразу, пока обновление ждёт
+    assert cache.get_or_fetch("1", fetch)["product"]["product_name"] == "Старое"
+    assert cache.get_or_fetch("1", fetch)["product"]["product_name"] == "Старое"
+    release.set()
+    deadline = time.monotonic() + 5
+    while cache.get("1")[0]["product"]["product_name"] != "Новое":
+        assert time.monotonic() < deadline, "кэш не обновился"
+        time.sleep(0.01)
+
+    # Одно фоновое обновление на штрихкод
+    assert calls == ["1"]
+    assert cache.stats()["stale_hits"] == 2
+
+
+def test_servable_until_max_stale_without_counting(cache, clock):
+    assert not cache.servable("1")
+    cache.put("1", found("1"))
+    clock.now += TTL + 1
+    # Устаревшая запись отдаётся без запроса к API
+    assert cache.servable("1")
+    clock.now += MAX_STALE
+    assert not cache.servable("1")
+    assert (cache.hits, cache.stale_hits, cache.misses) == (0, 0, 0)
+
+
+def test_failed_fetch_falls_back_to_cached_entry(cache, clock):
+    cache.put("1", found("1"))
+    clock.now += MAX_STALE + 1
+
+    def fail(code):
+        raise OSError("нет сети")
+
+    assert cache.get_or_fetch("1", fail) == found("1")
+    with pytest.raises(OSError):
+        cache.get_or_fetch("2", fail)
+
+
+def test_lru_evicts_least_recently_used(tmp_path, clock):
+    path = str(tmp_path / "lru.db")
+    cache = ProductCache(path, ttl=TTL, max_stale=MAX_STALE, max_entries=2)
+    for barcode in ("1", "2"):
+        cache.put(barcode, found(barcode))
+        clock.now += 1
+    # "1" использован позже "2" - вытесняется "2"
+    cache.get("1")
+    clock.now += 1
+    cache.put("3", found("3"))
+
+    assert cache.get("2") is None
+    assert cache.get("1") is not None and cache.get("3") is not None
+    assert cache.stats()["entries"] == 2
+
+    # Повторный put существующей записи не меняет счётчик
+    cache.put("3", found("3", "Другое"))
+    assert cache.stats()["entries"] == 2
+    cache.close()
+
+    # Счётчик записей восстанавливается из базы
+    reopened = ProductCache(path, ttl=TTL, max_stale=MAX_STALE, max_entries=2)
+    assert reopened.stats()["entries"] == 2
+    reopened.close()
+
+
+def test_contains_does_not_touch_lru(tmp_path, clock):
+    cache = ProductCache(str(tmp_path / "lru.db"), ttl=TTL, max_stale=MAX_STALE, max_entries=2)
+    for barcode in ("1", "2"):
+        cache.put(barcode, found(barcode))
+        clock.now += 1
+    # Проверка наличия не продлевает жизнь записи - вытесняется "1"
+    assert cache.contains("1") and not cache.contains("3")
+    clock.now += 1
+    cache.put("3", found("3"))
+
+    assert not cache.contains("1")
+    assert cache.contains("2") and cache.contains("3")
+    cache.close()
@@ -0,0 +1,62 @@
+"""
+Ключ кэша поиска: normalize_query (NFKC, регистр, пробелы, похожие буквы
+латиницы и кириллицы).
+"""
+import pytest
+
+from core.search_cache import SearchCache, normalize_query
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Milk", "milk"),
+    ("  milk   3  ", "milk 3"),
+    ("ＭＩＬＫ", "milk"),            # полноширинные буквы (NFKC)
+    ("ﬁsh", "fish"),                 # лигатура (NFKC)
+    ("Ёжик", "ёжик"),
+    ("молоко 3,2%", "молоко 3,2%"),
+])
+def test_normalize_query_case_width_spaces(query, expected):
+    assert normalize_query(query) == expected
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("мoлoкo", "молоко"),            # латинские o в кириллическом слове
+    ("сhocolate", "chocolate"),      # кириллическая с в латинском слове
+    ("Кефиp", "кефир"),              # латинская p, регистр
+    ("coca кола", "coca кола"),      # слова без смешения не меняются
+    ("ок", "ок"),
+    ("ok", "ok"),
+    ("oк", "ок"),                    # поровну букв - кириллица
+])
+def test_normalize_query_folds_lookalike_letters(query, expected):
+    assert normalize_query(query) == expected
+
+
+def test_normalize_query_leaves_words_without_lookalikes():
+    # Буквы вне таблицы похожих не трогаются, даже в смешанном слове
+    assert normalize_query("mилк") == "mилк"
+
+
+def test_cache_key_is_normalized_query():
+    cache = SearchCache()
+    cache.put("Мoлoкo ", ["молоко"])
+    assert cache.get("молоко") == ["молоко"]
+    assert cache.get("МОЛОКО") == ["молоко"]
+    assert cache.hits == 2
+
+
+def test_contains_without_counting():
+    cache = SearchCache()
+    assert not cache.contains("milk")
+    cache.put("Milk", ["milk"])
+    assert cache.contains("milk ")
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_get_without_counting_miss():
+    cache = SearchCache()
+    assert cache.get("milk", count_miss=False) is None
+    assert cache.misses == 0
+    cache.put("milk", ["milk"])
+    assert cache.get("milk", count_miss=False) == ["milk"]
+    assert (cache.hits, cache.misses) == (1, 0)
@@ -0,0 +1,145 @@
+"""
+SingleFlight: один вызов на ключ для одновременных запросов (из потоков
+и корутин), общий результат и общая ошибка.
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from core.singleflight import SingleFlight
+
+WAITERS = 4
+
+
+def run_concurrently(group, key, fn):
+    """WAITERS потоков вызывают group.do(key, fn); [(результат, ошибка)] потоков"""
+    outcomes = [None] * WAITERS
+
+    def worker(i):
+        try:
+            outcomes[i] = (group.do(key, fn), None)
+        except Exception as e:
+            outcomes[i] = (None, e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(WAITERS)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def wait_collapsed(group, count):
+    deadline = time.monotonic() + 5
+    while group.stats()["collapsed"] < count:
+        assert time.monotonic() < deadline, "потоки не присоединились к вызову"
+        time.sleep(0.005)
+
+
+def test_concurrent_calls_share_one_result():
+    group = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return {"status": 1}
+
+    threads, outcomes = run_concurrently(group, ("barcode", "1"), fetch)
+    wait_collapsed(group, WAITERS - 1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    results = [result for result, error in outcomes]
+    assert all(result is results[0] for result in results)
+    assert group.stats() == {"calls": 1, "collapsed": WAITERS - 1, "in_flight": 0}
+
+
+def test_error_is_shared_and_next_call_retries():
+    group = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fail():
+        calls.append(1)
+        release.wait(5)
+        raise OSError("нет сети")
+
+    threads, outcomes = run_concurrently(group, "key", fail)
+    wait_collapsed(group, WAITERS - 1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    # Ошибка одного запроса - у всех ожидавших, тот же объект исключения
+    assert len(calls) == 1
+    errors = [error for result, error in outcomes]
+    assert all(isinstance(error, OSError) and error is errors[0] for error in errors)
+    assert group.stats()["in_flight"] == 0
+
+    # Ошибка не запоминается: следующий вызов идёт заново
+    assert group.do("key", lambda: "ok") == "ok"
+    assert len(calls) == 1
+
+
+def test_sequential_and_different_keys_are_not_collapsed():
+    group = SingleFlight()
+    assert group.do("a", lambda: 1) == 1
+    assert group.do("a", lambda: 2) == 2
+    assert group.do("b", lambda x: x * 2, 21) == 42
+    with pytest.raises(ValueError):
+        group.do("c", int, "не число")
+    assert group.stats() == {"calls": 4, "collapsed": 0, "in_flight": 0}
+
+
+def test_do_async_shares_error_without_blocking_the_loop():
+    group = SingleFlight()
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        raise OSError("нет сети")
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        tick = asyncio.create_task(ticker())
+        outcomes = await asyncio.gather(*(group.do_async("key", fail) for _ in range(WAITERS)),
+                                        return_exceptions=True)
+        tick.cancel()
+        return outcomes, ticks
+
+    outcomes, ticks = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(isinstance(error, OSError) and error is outcomes[0] for error in outcomes)
+    # Ожидающие корутины не блокировали цикл событий
+    assert ticks > 3
+    assert group.stats() == {"calls": 1, "collapsed": WAITERS - 1, "in_flight": 0}
+
+
+def test_do_async_waits_for_thread_call():
+    group = SingleFlight()
+    release = threading.Event()
+    threads, outcomes = run_concurrently(group, "key", lambda: release.wait(5) and "из потока")
+    wait_collapsed(group, WAITERS - 1)
+
+    async def main():
+        waiter = asyncio.create_task(group.do_async("key", pytest.fail))
+        await asyncio.sleep(0.02)
+        release.set()
+        return await waiter
+
+    assert asyncio.run(main()) == "из потока"
+    for thread in threads:
+        thread.join(5)
+    assert [result for result, error in outcomes] == ["из потока"] * WAITERS